@@ -163,8 +163,21 @@ async def display_harem_page(
             )
         return
 
-    # Get filtered count
-    filtered_count = await get_collection_count(None, user_id, rarity_filter)
+    # Fetch the page; each row carries the filtered total
+    page = max(1, page)
+    offset = (page - 1) * CARDS_PER_PAGE
+    cards = await get_collection_cards(
+        pool=None,
+        user_id=user_id,
+        offset=offset,
+        limit=CARDS_PER_PAGE,
+        rarity_filter=rarity_filter
+    )
+
+    if cards:
+        filtered_count = cards[0]["total_count"]
+    else:
+        filtered_count = await get_collection_count(None, user_id, rarity_filter)
     
     if filtered_count == 0 and rarity_filter:
         rarity_name = RARITY_NAMES.get(rarity_filter, "Unknown")
@@ -185,17 +198,18 @@ async def display_harem_page(
 
     # Pagination
     total_pages = max(1, (filtered_count + CARDS_PER_PAGE - 1) // CARDS_PER_PAGE)
-    page = max(1, min(page, total_pages))
-    offset = (page - 1) * CARDS_PER_PAGE
 
-    # Fetch cards
-    cards = await get_collection_cards(
-        pool=None,
-        user_id=user_id,
-        offset=offset,
-        limit=CARDS_PER_PAGE,
-        rarity_filter=rarity_filter
-    )
+    if not cards:
+        # Requested page is past the end
+        page = min(page, total_pages)
+        offset = (page - 1) * CARDS_PER_PAGE
+        cards = await get_collection_cards(
+            pool=None,
+            user_id=user_id,
+            offset=offset,
+            limit=CARDS_PER_PAGE,
+            rarity_filter=rarity_filter
+        )
 
     if not cards:
         page = 1
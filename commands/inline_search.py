@@ -20,7 +20,7 @@ from telegram.ext import (
 )
 
 from config import Config
-from db import db
+from db import db, get_card_by_id, search_card_catalog
 from utils.logger import app_logger, error_logger
 from utils.rarity import rarity_to_text
 from utils.constants import RARITY_EMOJIS, RARITY_NAMES
@@ -149,98 +149,23 @@ async def inline_query_handler(update: Update, context: ContextTypes.DEFAULT_TYP
     try:
         parsed = parse_search_query(query)
         
-        # Build query based on type
+        # Served from the in-process card catalog: no query per keystroke
         if parsed["type"] == "card_id":
-            cards = await db.fetch(
-                """
-                SELECT 
-                    c.card_id, 
-                    c.character_name, 
-                    c.anime, 
-                    c.rarity, 
-                    c.photo_file_id,
-                    (
-                        SELECT COUNT(DISTINCT user_id) 
-                        FROM collections 
-                        WHERE card_id = c.card_id AND quantity > 0
-                    ) as owner_count
-                FROM cards c
-                WHERE c.is_active = TRUE AND c.card_id = $1
-                LIMIT 1
-                """,
-                parsed["value"]
-            )
+            card = await get_card_by_id(None, parsed["value"])
+            cards = [card] if card else []
         
         elif parsed["type"] == "rarity":
-            cards = await db.fetch(
-                """
-                SELECT 
-                    c.card_id, 
-                    c.character_name, 
-                    c.anime, 
-                    c.rarity, 
-                    c.photo_file_id,
-                    (
-                        SELECT COUNT(DISTINCT user_id) 
-                        FROM collections 
-                        WHERE card_id = c.card_id AND quantity > 0
-                    ) as owner_count
-                FROM cards c
-                WHERE c.is_active = TRUE AND c.rarity = $1
-                ORDER BY c.card_id ASC
-                LIMIT $2 OFFSET $3
-                """,
-                parsed["value"], RESULTS_PER_PAGE, offset
+            cards = await search_card_catalog(
+                None, rarity=parsed["value"], offset=offset, limit=RESULTS_PER_PAGE
             )
         
         elif parsed["type"] == "text":
-            search_pattern = f"%{parsed['value']}%"
-            cards = await db.fetch(
-                """
-                SELECT 
-                    c.card_id, 
-                    c.character_name, 
-                    c.anime, 
-                    c.rarity, 
-                    c.photo_file_id,
-                    (
-                        SELECT COUNT(DISTINCT user_id) 
-                        FROM collections 
-                        WHERE card_id = c.card_id AND quantity > 0
-                    ) as owner_count
-                FROM cards c
-                WHERE c.is_active = TRUE
-                  AND (
-                    LOWER(c.character_name) LIKE LOWER($1)
-                    OR LOWER(c.anime) LIKE LOWER($1)
-                  )
-                ORDER BY c.card_id ASC
-                LIMIT $2 OFFSET $3
-                """,
-                search_pattern, RESULTS_PER_PAGE, offset
+            cards = await search_card_catalog(
+                None, search_term=parsed["value"], offset=offset, limit=RESULTS_PER_PAGE
             )
         
         else:
-            cards = await db.fetch(
-                """
-                SELECT 
-                    c.card_id, 
-                    c.character_name, 
-                    c.anime, 
-                    c.rarity, 
-                    c.photo_file_id,
-                    (
-                        SELECT COUNT(DISTINCT user_id) 
-                        FROM collections 
-                        WHERE card_id = c.card_id AND quantity > 0
-                    ) as owner_count
-                FROM cards c
-                WHERE c.is_active = TRUE
-                ORDER BY c.card_id ASC
-                LIMIT $1 OFFSET $2
-                """,
-                RESULTS_PER_PAGE, offset
-            )
+            cards = await search_card_catalog(None, offset=offset, limit=RESULTS_PER_PAGE)
         
         if not cards and offset == 0:
             await update.inline_query.answer(
@@ -263,7 +188,7 @@ async def inline_query_handler(update: Update, context: ContextTypes.DEFAULT_TYP
             character_name = card["character_name"]
             anime = card["anime"]
             rarity = card.get("rarity", 1)
-            owner_count = card.get("owner_count", 0)
+            owner_count = card.get("unique_owners") or 0
             rarity_emoji = RARITY_EMOJIS.get(rarity, "❓")
             
             # Build caption for sent message
@@ -22,6 +22,7 @@ from config import Config
 from db import (
     db,
     get_global_stats,
+    get_rarity_distribution,
     get_top_catchers,
     ensure_user,
 )
@@ -163,15 +164,7 @@ async def show_leaderboard(
             )
         else:
             # catches or cards
-            users = await db.fetch(
-                """
-                SELECT user_id, username, first_name, coins, level, total_catches
-                FROM users
-                WHERE is_banned = FALSE AND total_catches > 0
-                ORDER BY total_catches DESC
-                LIMIT 100
-                """
-            )
+            users = await get_top_catchers(None, limit=100)
     except Exception as e:
         error_logger.error(f"Leaderboard query error: {e}")
         users = []
@@ -452,15 +445,8 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     # Add rarity breakdown if admin
     if Config.is_admin(user.id):
         try:
-            rarity_stats = await db.fetch(
-                """
-                SELECT rarity, COUNT(*) as count
-                FROM cards
-                WHERE is_active = TRUE
-                GROUP BY rarity
-                ORDER BY rarity DESC
-                """
-            )
+            # Cached helper, sorted ascending; this view lists rarest first
+            rarity_stats = list(reversed(await get_rarity_distribution(None)))
             
             if rarity_stats:
                 from utils.rarity import rarity_to_text
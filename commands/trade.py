@@ -31,6 +31,7 @@ from db import (
     get_card_by_id,
     count_pending_trades,
     transfer_card_between_users,
+    execute_trade,
     get_user_card_quantity,
     get_user_by_id,
 )
@@ -922,31 +923,15 @@ async def trade_accept_callback(update: Update, context: ContextTypes.DEFAULT_TY
         await query.answer(f"Trade is {trade['status']}", show_alert=True)
         return
 
-    # Execute transfer
     from_user = trade["from_user"]
-    to_user = trade["to_user"]
-    offered_card_id = trade["offered_card_id"]
-    requested_card_id = trade.get("requested_card_id")
 
-    # Transfer offered card
-    success, msg = await transfer_card_between_users(None, from_user, to_user, offered_card_id, 1)
+    # Execute both legs and the status change in one transaction
+    success, msg = await execute_trade(None, trade_id, user_id)
 
     if not success:
-        await update_trade_status(None, trade_id, "failed")
         await query.answer(f"Failed: {msg}", show_alert=True)
         return
 
-    # Transfer requested card if exists
-    if requested_card_id:
-        success2, msg2 = await transfer_card_between_users(None, to_user, from_user, requested_card_id, 1)
-        if not success2:
-            await update_trade_status(None, trade_id, "failed")
-            await query.answer(f"Partial failure: {msg2}", show_alert=True)
-            return
-
-    # Complete trade
-    await update_trade_status(None, trade_id, "completed")
-
     offered_char = trade.get("offered_character", "Card")
     offered_emoji = RARITY_EMOJIS.get(trade.get("offered_rarity", 1), "❓")
 
@@ -5,19 +5,21 @@
 # ============================================================
 
 import asyncio
+import functools
+import itertools
+import random
 import ssl
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import Optional, Any, List
+from typing import Optional, Any, List, Union
 from contextlib import asynccontextmanager
 from urllib.parse import urlparse, parse_qs
 
 import asyncpg
 from asyncpg import Pool, Connection, Record
 from asyncpg.exceptions import (
-    DuplicateTableError,
-    DuplicateObjectError,
     UndefinedTableError,
-    PostgresError,
 )
 
 from config import Config
@@ -28,12 +30,253 @@ from utils.logger import app_logger, error_logger, log_database
 # 🗄️ Database Pool Management
 # ============================================================
 
+# Columns callers actually read; skips wide TEXT/JSONB fields like bio and tags
+USER_COLUMNS = (
+    "user_id, username, first_name, last_name, coins, xp, level, role, "
+    "is_banned, total_catches, created_at"
+)
+CARD_COLUMNS = (
+    "card_id, anime, character_name, rarity, photo_file_id, uploader_id, "
+    "created_at, is_active, total_caught, unique_owners, total_in_circulation"
+)
+GROUP_COLUMNS = (
+    "group_id, group_name, is_active, spawn_enabled, drop_enabled, "
+    "total_spawns, total_catches, joined_at"
+)
+
+# Shape-stable hot queries. They run as plain SQL text, so asyncpg's per-connection
+# statement cache (DB_STATEMENT_CACHE_SIZE) prepares each one once and reuses the plan.
+# PreparedStatement handles are never kept: asyncpg invalidates them on pool release.
+HOT_STATEMENTS: dict[str, str] = {
+    "ensure_user": f"""
+        INSERT INTO users (user_id, username, first_name, last_name)
+        VALUES ($1, $2, $3, $4)
+        ON CONFLICT (user_id) DO UPDATE SET
+            username = COALESCE($2, users.username),
+            first_name = COALESCE($3, users.first_name),
+            last_name = COALESCE($4, users.last_name),
+            updated_at = NOW()
+        RETURNING {USER_COLUMNS}
+    """,
+    "user_by_id": f"SELECT {USER_COLUMNS} FROM users WHERE user_id = $1",
+    "user_role": "SELECT role FROM users WHERE user_id = $1",
+    "update_user_stats": f"""
+        UPDATE users SET
+            coins = coins + $2,
+            xp = xp + $3,
+            total_catches = total_catches + $4,
+            updated_at = NOW()
+        WHERE user_id = $1
+        RETURNING {USER_COLUMNS}
+    """,
+    "increment_card_caught": "UPDATE cards SET total_caught = total_caught + 1 WHERE card_id = $1",
+    "add_to_collection": """
+        INSERT INTO collections (user_id, card_id, caught_in_group)
+        VALUES ($1, $2, $3)
+        ON CONFLICT (user_id, card_id) DO UPDATE SET
+            quantity = collections.quantity + 1,
+            caught_at = NOW()
+        RETURNING *
+    """,
+    "user_card_ids": "SELECT card_id FROM collections WHERE user_id = $1",
+    # Run for every group message by the drop counter
+    "ensure_group": """
+        INSERT INTO groups (group_id, group_name, drop_enabled, message_count)
+        VALUES ($1, $2, TRUE, 0)
+        ON CONFLICT (group_id) DO UPDATE
+        SET group_name = COALESCE($2, groups.group_name)
+    """,
+    "increment_message_count": """
+        INSERT INTO groups (group_id, message_count, drop_enabled)
+        VALUES ($1, 1, TRUE)
+        ON CONFLICT (group_id) DO UPDATE
+        SET message_count = COALESCE(groups.message_count, 0) + 1,
+            last_seen = NOW()
+        RETURNING message_count
+    """,
+    "touch_group": "UPDATE groups SET last_seen = NOW() WHERE group_id = $1",
+    "group_drop_settings": """
+        SELECT drop_threshold, drop_enabled, message_count, last_drop_at
+        FROM groups WHERE group_id = $1
+    """,
+    # Every write of a catch in one atomic round trip
+    "apply_catch": """
+        WITH catcher AS (
+            INSERT INTO users (user_id, username, first_name, coins, xp, total_catches)
+            VALUES ($1, $4, $5, $6, $7, 1)
+            ON CONFLICT (user_id) DO UPDATE SET
+                username = COALESCE($4, users.username),
+                first_name = COALESCE($5, users.first_name),
+                coins = users.coins + $6,
+                xp = users.xp + $7,
+                total_catches = COALESCE(users.total_catches, 0) + 1,
+                updated_at = NOW()
+        ),
+        caught AS (
+            INSERT INTO collections (user_id, card_id, caught_in_group)
+            VALUES ($1, $2, $3)
+            ON CONFLICT (user_id, card_id) DO UPDATE SET
+                quantity = collections.quantity + 1,
+                caught_at = NOW()
+            RETURNING *
+        ),
+        card AS (
+            UPDATE cards SET total_caught = COALESCE(total_caught, 0) + 1
+            WHERE card_id = $2
+        ),
+        grp AS (
+            UPDATE groups SET total_catches = COALESCE(total_catches, 0) + 1
+            WHERE group_id = $3
+        )
+        SELECT * FROM caught
+    """,
+    "user_card_qty": """
+        SELECT quantity FROM collections
+        WHERE user_id = $1 AND card_id = $2
+    """,
+    "user_owns_card": """
+        SELECT EXISTS (
+            SELECT 1 FROM collections
+            WHERE user_id = $1 AND card_id = $2 AND quantity > 0
+        )
+    """,
+    # Sender loses the stack or part of it (the two predicates are disjoint),
+    # receiver gains it only if one of them matched
+    "transfer_cards": """
+        WITH removed AS (
+            DELETE FROM collections
+            WHERE user_id = $1 AND card_id = $3 AND quantity = $4
+            RETURNING 1
+        ),
+        decremented AS (
+            UPDATE collections SET quantity = quantity - $4
+            WHERE user_id = $1 AND card_id = $3 AND quantity > $4
+            RETURNING 1
+        )
+        INSERT INTO collections (user_id, card_id, quantity, caught_at)
+        SELECT $2::bigint, $3, $4, NOW()
+        WHERE EXISTS (SELECT 1 FROM removed UNION ALL SELECT 1 FROM decremented)
+        ON CONFLICT (user_id, card_id) DO UPDATE
+        SET quantity = collections.quantity + EXCLUDED.quantity
+        RETURNING quantity
+    """,
+    "lock_trade_pair": """
+        SELECT user_id, card_id, quantity FROM collections
+        WHERE (user_id = $1 AND card_id = $2)
+           OR (user_id = $3 AND card_id = $4)
+        FOR UPDATE
+    """,
+    # Card detail views (cardinfo and the harem card page)
+    "card_details": f"""
+        SELECT {CARD_COLUMNS} FROM cards
+        WHERE card_id = $1 AND is_active = TRUE
+    """,
+    "card_owners": """
+        SELECT 
+            u.user_id, 
+            u.first_name, 
+            u.username, 
+            c.quantity,
+            c.caught_at,
+            c.is_favorite
+        FROM collections c
+        JOIN users u ON c.user_id = u.user_id
+        WHERE c.card_id = $1 AND c.quantity > 0
+        ORDER BY c.quantity DESC, c.caught_at ASC
+        LIMIT $2
+    """,
+    "top_catchers": """
+        SELECT user_id, username, first_name, total_catches, level, coins
+        FROM mv_top_catchers
+        ORDER BY total_catches DESC
+        LIMIT $1
+    """,
+    "collection_cards": """
+        SELECT 
+            c.collection_id, c.user_id, c.card_id, c.quantity, c.caught_at, c.is_favorite,
+            ca.anime, ca.character_name, ca.rarity, ca.photo_file_id, ca.total_caught,
+            COUNT(*) OVER() AS total_count
+        FROM collections c
+        JOIN cards ca ON c.card_id = ca.card_id
+        WHERE c.user_id = $1 
+          AND ca.is_active = TRUE
+          AND c.quantity > 0
+        ORDER BY ca.rarity DESC, ca.character_name ASC
+        LIMIT $2 OFFSET $3
+    """,
+    "collection_cards_by_rarity": """
+        SELECT 
+            c.collection_id, c.user_id, c.card_id, c.quantity, c.caught_at, c.is_favorite,
+            ca.anime, ca.character_name, ca.rarity, ca.photo_file_id, ca.total_caught,
+            COUNT(*) OVER() AS total_count
+        FROM collections c
+        JOIN cards ca ON c.card_id = ca.card_id
+        WHERE c.user_id = $1 
+          AND ca.is_active = TRUE 
+          AND ca.rarity = $4
+          AND c.quantity > 0
+        ORDER BY ca.rarity DESC, ca.character_name ASC
+        LIMIT $2 OFFSET $3
+    """,
+}
+
+
+class BotConnection(Connection):
+    """Pooled connection that skips the session reset on release unless it is needed."""
+    
+    async def reset(self, *, timeout: Optional[float] = None) -> None:
+        # Helpers leave no session state behind (no LISTEN, advisory locks or SET),
+        # so the reset round trip is only needed if a transaction was left open.
+        if Config.DB_RESET_ON_RELEASE or self.is_in_transaction():
+            await super().reset(timeout=timeout)
+
+
+@functools.cache
+def _db_params() -> dict:
+    """Connection settings parsed once from Config.DATABASE_URL."""
+    url = Config.DATABASE_URL
+    listen_url = Config.DATABASE_DIRECT_URL or url
+    
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    if listen_url.startswith("postgres://"):
+        listen_url = listen_url.replace("postgres://", "postgresql://", 1)
+    
+    parsed = urlparse(url)
+    sslmode = parse_qs(parsed.query).get("sslmode", [""])[0]
+    
+    return {
+        "dsn": url,
+        "listen_dsn": listen_url,
+        "host": parsed.hostname,
+        "port": parsed.port or 5432,
+        "user": parsed.username,
+        "password": parsed.password,
+        "database": parsed.path.lstrip("/"),
+        "ssl": sslmode in {"require", "verify-ca", "verify-full"},
+    }
+
+
+@functools.cache
+def _ssl_context() -> Optional[ssl.SSLContext]:
+    """Built once and shared by the pool, the listener and every reconnect."""
+    db_params = _db_params()
+    if not (db_params["ssl"] or "railway" in str(db_params["host"] or "")):
+        return None
+    
+    ssl_context = ssl.create_default_context()
+    ssl_context.check_hostname = False
+    ssl_context.verify_mode = ssl.CERT_NONE
+    return ssl_context
+
+
 class Database:
     """
     Async database manager using asyncpg connection pool.
     """
     
     _pool: Optional[Pool] = None
+    _listener: Optional[Connection] = None
     _instance: Optional["Database"] = None
     
     def __new__(cls) -> "Database":
@@ -51,24 +294,6 @@ class Database:
     def is_connected(self) -> bool:
         return self._pool is not None
     
-    def _parse_database_url(self) -> dict:
-        url = Config.DATABASE_URL
-        
-        if url.startswith("postgres://"):
-            url = url.replace("postgres://", "postgresql://", 1)
-        
-        parsed = urlparse(url)
-        query_params = parse_qs(parsed.query)
-        
-        return {
-            "host": parsed.hostname,
-            "port": parsed.port or 5432,
-            "user": parsed.username,
-            "password": parsed.password,
-            "database": parsed.path.lstrip("/"),
-            "ssl": "sslmode" in query_params or "require" in str(query_params.get("sslmode", [])),
-        }
-    
     async def connect(self, max_retries: int = 3, retry_delay: int = 2) -> bool:
         if self._pool is not None:
             log_database("Connection pool already exists")
@@ -81,24 +306,19 @@ class Database:
             )
             return False
         
-        db_params = self._parse_database_url()
+        db_params = _db_params()
         
-        log_database(f"Connecting to database at {db_params['host']}:{db_params['port']}...")
+        log_database("Connecting to database at %s:%s...", db_params["host"], db_params["port"])
         
-        ssl_context = None
-        if db_params.get("ssl") or "railway" in str(db_params.get("host", "")):
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
+        ssl_context = _ssl_context()
+        if ssl_context is not None:
             log_database("Using SSL connection")
         
-        dsn = Config.DATABASE_URL
-        if dsn.startswith("postgres://"):
-            dsn = dsn.replace("postgres://", "postgresql://", 1)
+        dsn = db_params["dsn"]
         
         for attempt in range(1, max_retries + 1):
             try:
-                log_database(f"Connection attempt {attempt}/{max_retries}...")
+                log_database("Connection attempt %d/%d...", attempt, max_retries)
                 
                 self._pool = await asyncpg.create_pool(
                     dsn=dsn,
@@ -106,14 +326,19 @@ class Database:
                     max_size=Config.DB_MAX_CONNECTIONS,
                     command_timeout=60,
                     ssl=ssl_context,
+                    connection_class=BotConnection,
+                    # Keep idle connections open so a quiet spell doesn't
+                    # cost a fresh TLS handshake on the next catch
+                    max_inactive_connection_lifetime=Config.DB_MAX_INACTIVE_LIFETIME,
+                    statement_cache_size=Config.DB_STATEMENT_CACHE_SIZE,
                 )
                 
                 async with self._pool.acquire() as conn:
                     await conn.execute("SELECT 1")
                 
                 log_database(
-                    f"✅ Database connected! "
-                    f"(pool: {Config.DB_MIN_CONNECTIONS}-{Config.DB_MAX_CONNECTIONS})"
+                    "✅ Database connected! (pool: %d-%d)",
+                    Config.DB_MIN_CONNECTIONS, Config.DB_MAX_CONNECTIONS
                 )
                 return True
                 
@@ -131,7 +356,7 @@ class Database:
                 )
                 
                 if attempt < max_retries:
-                    log_database(f"Retrying in {retry_delay} seconds...")
+                    log_database("Retrying in %s seconds...", retry_delay)
                     await asyncio.sleep(retry_delay)
                 else:
                     error_logger.error(
@@ -141,7 +366,23 @@ class Database:
         
         return False
     
+    async def listen(self, channel: str, callback) -> None:
+        """
+        Subscribe to a NOTIFY channel on a dedicated connection.
+        Kept outside the pool so connection resets never drop the listener.
+        """
+        if self._listener is None:
+            self._listener = await asyncpg.connect(
+                dsn=_db_params()["listen_dsn"],
+                ssl=_ssl_context(),
+            )
+        await self._listener.add_listener(channel, callback)
+    
     async def disconnect(self) -> None:
+        if self._listener is not None:
+            await self._listener.close()
+            self._listener = None
+        
         if self._pool is not None:
             log_database("Closing database pool...")
             await self._pool.close()
@@ -155,342 +396,650 @@ class Database:
         async with self.pool.acquire() as connection:
             yield connection
     
+    # Pool.execute/fetch/... acquire and release internally; only
+    # transactions need acquire() above.
     async def execute(self, query: str, *args) -> str:
         if not self.is_connected:
             raise RuntimeError("Database not connected")
-        async with self.acquire() as conn:
-            return await conn.execute(query, *args)
+        return await self._pool.execute(query, *args)
     
     async def fetch(self, query: str, *args) -> List[Record]:
         if not self.is_connected:
             raise RuntimeError("Database not connected")
-        async with self.acquire() as conn:
-            return await conn.fetch(query, *args)
+        return await self._pool.fetch(query, *args)
     
     async def fetchrow(self, query: str, *args) -> Optional[Record]:
         if not self.is_connected:
             raise RuntimeError("Database not connected")
-        async with self.acquire() as conn:
-            return await conn.fetchrow(query, *args)
+        return await self._pool.fetchrow(query, *args)
     
     async def fetchval(self, query: str, *args) -> Any:
         if not self.is_connected:
             raise RuntimeError("Database not connected")
-        async with self.acquire() as conn:
-            return await conn.fetchval(query, *args)
+        return await self._pool.fetchval(query, *args)
+    
+    # Named HOT_STATEMENTS; asyncpg's statement cache keeps them prepared
+    async def fetch_prepared(self, name: str, *args) -> List[Record]:
+        return await self.fetch(HOT_STATEMENTS[name], *args)
+    
+    async def execute_prepared(self, name: str, *args) -> str:
+        return await self.execute(HOT_STATEMENTS[name], *args)
+    
+    async def fetchrow_prepared(self, name: str, *args) -> Optional[Record]:
+        return await self.fetchrow(HOT_STATEMENTS[name], *args)
+    
+    async def fetchval_prepared(self, name: str, *args) -> Any:
+        return await self.fetchval(HOT_STATEMENTS[name], *args)
 
 
 # Global database instance
 db = Database()
 
 
+# ============================================================
+# 🧠 Query Cache
+# ============================================================
+
+_query_cache: dict[str, tuple[Any, float]] = {}
+_query_cache_locks: dict[str, asyncio.Lock] = {}
+
+
+def async_ttl_cache(ttl: int):
+    """
+    Cache a read-only query helper's result for `ttl` seconds.
+    The pool argument is ignored when building the cache key. Errors are not
+    cached, so helpers should raise rather than return a fallback value.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(pool: Optional[Pool] = None, *args, **kwargs):
+            key = f"{func.__name__}:{args!r}:{sorted(kwargs.items())!r}"
+
+            cached = _query_cache.get(key)
+            if cached and cached[1] > time.monotonic():
+                return cached[0]
+
+            lock = _query_cache_locks.setdefault(key, asyncio.Lock())
+            async with lock:
+                # Another caller may have refreshed it while we waited
+                cached = _query_cache.get(key)
+                if cached and cached[1] > time.monotonic():
+                    return cached[0]
+
+                try:
+                    value = await func(pool, *args, **kwargs)
+                    if db.is_connected:
+                        _query_cache[key] = (value, time.monotonic() + ttl)
+                    return value
+                finally:
+                    # Queued waiters keep their reference; later callers hit
+                    # the fresh entry, so the lock is only needed until now
+                    if _query_cache_locks.get(key) is lock:
+                        del _query_cache_locks[key]
+
+        return wrapper
+    return decorator
+
+
+def invalidate_query_cache(prefix: str = "") -> None:
+    """Drop cached query results whose key starts with `prefix` (all if empty)."""
+    for key in [k for k in _query_cache if k.startswith(prefix)]:
+        _query_cache.pop(key, None)
+
+
+# Tables whose writes NOTIFY bot_invalidate, and the cached helpers they affect
+_INVALIDATION_PREFIXES: dict[str, tuple[str, ...]] = {
+    "users": ("_fetch_global_stats",),
+    "groups": ("_fetch_global_stats", "get_all_groups", "get_active_group_ids"),
+    "cards": ("_fetch_global_stats", "get_rarity_distribution", "get_rarest_cards"),
+}
+
+
+def _on_invalidate(conn: Connection, pid: int, channel: str, table: str) -> None:
+    for prefix in _INVALIDATION_PREFIXES.get(table, ("",)):
+        invalidate_query_cache(prefix)
+    if table == "cards":
+        invalidate_card_pool()
+
+
+async def start_cache_invalidation_listener() -> bool:
+    """Drop cached query results as soon as another writer touches their tables."""
+    if not db.is_connected:
+        return False
+
+    try:
+        await db.listen("bot_invalidate", _on_invalidate)
+        log_database("✅ Cache invalidation listener ready")
+        return True
+    except Exception as e:
+        error_logger.error(f"Failed to start cache invalidation listener: {e}")
+        return False
+
+
 # ============================================================
 # 🏗️ Schema Initialization
 # ============================================================
 
+# Whole schema as one script so startup costs a single round trip.
+# Safe to re-run: everything is IF NOT EXISTS, OR REPLACE or skipped on duplicate.
+SCHEMA_SQL = """
+    -- ========================================
+    -- 1. Users Table
+    -- ========================================
+    CREATE TABLE IF NOT EXISTS users (
+        user_id BIGINT PRIMARY KEY,
+        username VARCHAR(255),
+        first_name VARCHAR(255),
+        last_name VARCHAR(255),
+        coins INTEGER DEFAULT 0,
+        xp INTEGER DEFAULT 0,
+        level INTEGER DEFAULT 1,
+        role VARCHAR(20) DEFAULT NULL,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+        is_banned BOOLEAN DEFAULT FALSE,
+        ban_reason TEXT,
+        total_catches INTEGER DEFAULT 0,
+        daily_streak INTEGER DEFAULT 0,
+        last_daily TIMESTAMP WITH TIME ZONE,
+        favorite_card_id INTEGER,
+        bio TEXT
+    );
+
+    ALTER TABLE users 
+    ADD COLUMN IF NOT EXISTS role VARCHAR(20) DEFAULT NULL;
+
+    -- ========================================
+    -- 2. Cards Table
+    -- ========================================
+    CREATE TABLE IF NOT EXISTS cards (
+        card_id SERIAL PRIMARY KEY,
+        anime VARCHAR(255) NOT NULL,
+        character_name VARCHAR(255) NOT NULL,
+        rarity INTEGER NOT NULL CHECK (rarity BETWEEN 1 AND 11),
+        photo_file_id TEXT NOT NULL,
+        uploader_id BIGINT,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+        is_active BOOLEAN DEFAULT TRUE,
+        total_caught INTEGER DEFAULT 0,
+        description TEXT,
+        tags TEXT[]
+    );
+
+    -- ========================================
+    -- 3. Collections Table
+    -- ========================================
+    CREATE TABLE IF NOT EXISTS collections (
+        collection_id SERIAL PRIMARY KEY,
+        user_id BIGINT NOT NULL,
+        card_id INTEGER NOT NULL,
+        caught_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+        caught_in_group BIGINT,
+        is_favorite BOOLEAN DEFAULT FALSE,
+        trade_locked BOOLEAN DEFAULT FALSE,
+        quantity INTEGER DEFAULT 1
+    );
+
+    -- ========================================
+    -- 4. Groups Table
+    -- ========================================
+    CREATE TABLE IF NOT EXISTS groups (
+        group_id BIGINT PRIMARY KEY,
+        group_name VARCHAR(255),
+        is_active BOOLEAN DEFAULT TRUE,
+        spawn_enabled BOOLEAN DEFAULT TRUE,
+        cooldown_seconds INTEGER DEFAULT 60,
+        last_spawn TIMESTAMP WITH TIME ZONE,
+        current_card_id INTEGER,
+        current_card_message_id BIGINT,
+        total_spawns INTEGER DEFAULT 0,
+        total_catches INTEGER DEFAULT 0,
+        joined_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+        settings JSONB DEFAULT '{}'::jsonb
+    );
+
+    -- ========================================
+    -- 4b. Drop System Columns
+    -- ========================================
+    ALTER TABLE groups 
+    ADD COLUMN IF NOT EXISTS drop_threshold INTEGER DEFAULT 50,
+    ADD COLUMN IF NOT EXISTS drop_enabled BOOLEAN DEFAULT TRUE,
+    ADD COLUMN IF NOT EXISTS message_count INTEGER DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS last_drop_at TIMESTAMP WITH TIME ZONE;
+
+    -- Stamped by the message counter; not indexed, so that per-message
+    -- update stays a HOT update
+    ALTER TABLE groups 
+    ADD COLUMN IF NOT EXISTS last_seen TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+
+    ALTER TABLE cards 
+    ADD COLUMN IF NOT EXISTS image_url TEXT;
+
+    -- Telegram's stable photo id, used to reject duplicate uploads
+    ALTER TABLE cards 
+    ADD COLUMN IF NOT EXISTS photo_unique_id TEXT;
+
+    CREATE INDEX IF NOT EXISTS idx_cards_photo_unique_id 
+    ON cards(photo_unique_id);
+
+    -- ========================================
+    -- 5. Trades Table
+    -- ========================================
+    CREATE TABLE IF NOT EXISTS trades (
+        id SERIAL PRIMARY KEY,
+        from_user BIGINT NOT NULL,
+        to_user BIGINT NOT NULL,
+        offered_card_id INTEGER NOT NULL,
+        requested_card_id INTEGER,
+        status TEXT NOT NULL DEFAULT 'pending',
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+        CONSTRAINT valid_status CHECK (status IN ('pending', 'accepted', 'rejected', 'cancelled', 'completed', 'failed')),
+        CONSTRAINT no_self_trade CHECK (from_user != to_user)
+    );
+
+    -- ========================================
+    -- 6. Stats Table
+    -- ========================================
+    CREATE TABLE IF NOT EXISTS stats (
+        id SERIAL PRIMARY KEY,
+        key TEXT UNIQUE NOT NULL,
+        value BIGINT DEFAULT 0,
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    );
+
+    -- ========================================
+    -- 7. Constraints (no IF NOT EXISTS form, so check pg_constraint first)
+    -- ========================================
+    -- Rows that already violate a constraint leave it off, as before
+    DO $$ BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_constraint
+            WHERE conrelid = 'cards'::regclass AND conname = 'cards_anime_character_unique'
+        ) THEN
+            BEGIN
+                ALTER TABLE cards
+                ADD CONSTRAINT cards_anime_character_unique
+                UNIQUE (anime, character_name);
+            EXCEPTION WHEN unique_violation THEN NULL;
+            END;
+        END IF;
+
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_constraint
+            WHERE conrelid = 'collections'::regclass AND conname = 'collections_user_card_unique'
+        ) THEN
+            BEGIN
+                ALTER TABLE collections
+                ADD CONSTRAINT collections_user_card_unique
+                UNIQUE (user_id, card_id) INCLUDE (quantity, caught_at, is_favorite);
+            EXCEPTION WHEN unique_violation THEN NULL;
+            END;
+        END IF;
+
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_constraint
+            WHERE conrelid = 'collections'::regclass AND conname = 'fk_collections_user'
+        ) THEN
+            BEGIN
+                ALTER TABLE collections
+                ADD CONSTRAINT fk_collections_user
+                FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE;
+            EXCEPTION WHEN foreign_key_violation THEN NULL;
+            END;
+        END IF;
+
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_constraint
+            WHERE conrelid = 'collections'::regclass AND conname = 'fk_collections_card'
+        ) THEN
+            BEGIN
+                ALTER TABLE collections
+                ADD CONSTRAINT fk_collections_card
+                FOREIGN KEY (card_id) REFERENCES cards(card_id) ON DELETE CASCADE;
+            EXCEPTION WHEN foreign_key_violation THEN NULL;
+            END;
+        END IF;
+
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_constraint
+            WHERE conrelid = 'trades'::regclass AND conname = 'fk_trades_from_user'
+        ) THEN
+            BEGIN
+                ALTER TABLE trades
+                ADD CONSTRAINT fk_trades_from_user
+                FOREIGN KEY (from_user) REFERENCES users(user_id) ON DELETE CASCADE;
+            EXCEPTION WHEN foreign_key_violation THEN NULL;
+            END;
+        END IF;
+
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_constraint
+            WHERE conrelid = 'trades'::regclass AND conname = 'fk_trades_to_user'
+        ) THEN
+            BEGIN
+                ALTER TABLE trades
+                ADD CONSTRAINT fk_trades_to_user
+                FOREIGN KEY (to_user) REFERENCES users(user_id) ON DELETE CASCADE;
+            EXCEPTION WHEN foreign_key_violation THEN NULL;
+            END;
+        END IF;
+
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_constraint
+            WHERE conrelid = 'trades'::regclass AND conname = 'fk_trades_offered_card'
+        ) THEN
+            BEGIN
+                ALTER TABLE trades
+                ADD CONSTRAINT fk_trades_offered_card
+                FOREIGN KEY (offered_card_id) REFERENCES cards(card_id) ON DELETE CASCADE;
+            EXCEPTION WHEN foreign_key_violation THEN NULL;
+            END;
+        END IF;
+
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_constraint
+            WHERE conrelid = 'trades'::regclass AND conname = 'fk_trades_requested_card'
+        ) THEN
+            BEGIN
+                ALTER TABLE trades
+                ADD CONSTRAINT fk_trades_requested_card
+                FOREIGN KEY (requested_card_id) REFERENCES cards(card_id) ON DELETE SET NULL;
+            EXCEPTION WHEN foreign_key_violation THEN NULL;
+            END;
+        END IF;
+    END $$;
+
+    -- ========================================
+    -- 8. Indexes
+    -- ========================================
+    -- Serves card lookups and the top-owners list in order, without a sort;
+    -- supersedes the card_id-only index
+    CREATE INDEX IF NOT EXISTS idx_collections_card_owners 
+    ON collections(card_id, quantity DESC, caught_at) INCLUDE (user_id, is_favorite);
+
+    DROP INDEX IF EXISTS idx_collections_card_id;
+
+    -- The unique constraint's index covers per-user collection reads and
+    -- supersedes the user_id-only index. Older databases swap their plain
+    -- constraint index for the covering one, so only one index is maintained.
+    DO $$ BEGIN
+        IF EXISTS (
+            SELECT 1 FROM pg_constraint c
+            JOIN pg_index i ON i.indexrelid = c.conindid
+            WHERE c.conrelid = 'collections'::regclass
+              AND c.conname = 'collections_user_card_unique'
+              AND i.indnatts = i.indnkeyatts
+        ) THEN
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_collections_user_covering 
+            ON collections(user_id, card_id) INCLUDE (quantity, caught_at, is_favorite);
+
+            ALTER TABLE collections
+                DROP CONSTRAINT collections_user_card_unique,
+                ADD CONSTRAINT collections_user_card_unique
+                UNIQUE USING INDEX idx_collections_user_covering;
+        END IF;
+    END $$;
+
+    DROP INDEX IF EXISTS idx_collections_user_card_inc;
+
+    DROP INDEX IF EXISTS idx_collections_user_id;
+
+    -- Keep the visibility map fresh so collection lookups stay index-only
+    ALTER TABLE collections SET (autovacuum_vacuum_scale_factor = 0.05);
+
+    CREATE INDEX IF NOT EXISTS idx_cards_rarity 
+    ON cards(rarity);
+
+    CREATE INDEX IF NOT EXISTS idx_cards_anime 
+    ON cards(anime);
+
+    -- Trigram indexes let the ILIKE '%term%' searches use an index.
+    -- pg_trgm may be missing from the server or unavailable to this role, so
+    -- both steps are best-effort; the searches still work, just unindexed.
+    DO $$ BEGIN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    EXCEPTION WHEN OTHERS THEN
+        RAISE NOTICE 'pg_trgm unavailable, skipping trigram indexes: %', SQLERRM;
+    END $$;
+
+    DO $$ BEGIN
+        IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+            CREATE INDEX IF NOT EXISTS idx_cards_anime_trgm 
+            ON cards USING gin (anime gin_trgm_ops);
+            CREATE INDEX IF NOT EXISTS idx_cards_character_trgm 
+            ON cards USING gin (character_name gin_trgm_ops);
+        END IF;
+    END $$;
+
+    CREATE INDEX IF NOT EXISTS idx_cards_active 
+    ON cards(is_active) WHERE is_active = TRUE;
+
+    CREATE INDEX IF NOT EXISTS idx_groups_active 
+    ON groups(is_active) WHERE is_active = TRUE;
+
+    CREATE INDEX IF NOT EXISTS idx_users_banned 
+    ON users(is_banned) WHERE is_banned = FALSE;
+
+    CREATE INDEX IF NOT EXISTS idx_users_role 
+    ON users(role) WHERE role IS NOT NULL;
+
+    CREATE INDEX IF NOT EXISTS idx_trades_to_user 
+    ON trades(to_user);
+
+    CREATE INDEX IF NOT EXISTS idx_trades_from_user 
+    ON trades(from_user);
+
+    CREATE INDEX IF NOT EXISTS idx_trades_status 
+    ON trades(status);
+
+    CREATE INDEX IF NOT EXISTS idx_trades_pending 
+    ON trades(to_user, status) WHERE status = 'pending';
+
+    CREATE INDEX IF NOT EXISTS idx_users_top_catchers 
+    ON users(total_catches DESC) WHERE is_banned = FALSE AND total_catches > 0;
+
+    CREATE INDEX IF NOT EXISTS idx_cards_rarest 
+    ON cards(rarity DESC, total_caught ASC) WHERE is_active = TRUE;
+
+    CREATE INDEX IF NOT EXISTS idx_groups_last_spawn 
+    ON groups(last_spawn) WHERE is_active = TRUE;
+
+    -- ========================================
+    -- 8b. Leaderboard Materialized View
+    -- ========================================
+    CREATE MATERIALIZED VIEW IF NOT EXISTS mv_top_catchers AS
+    SELECT user_id, username, first_name, total_catches, level, coins
+    FROM users
+    WHERE is_banned = FALSE AND total_catches > 0
+    ORDER BY total_catches DESC
+    LIMIT 1000;
+
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_top_catchers_user 
+    ON mv_top_catchers(user_id);
+
+    -- ========================================
+    -- 8c. Card Circulation Counters
+    -- ========================================
+    -- Kept in step with collections by trigger; init_db backfills on first run
+
+    ALTER TABLE cards 
+    ADD COLUMN IF NOT EXISTS unique_owners INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS total_in_circulation BIGINT NOT NULL DEFAULT 0;
+
+    CREATE OR REPLACE FUNCTION sync_card_circulation() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE' AND NEW.card_id = OLD.card_id THEN
+            IF COALESCE(NEW.quantity, 0) <> COALESCE(OLD.quantity, 0) THEN
+                UPDATE cards SET
+                    total_in_circulation = total_in_circulation
+                        + COALESCE(NEW.quantity, 0) - COALESCE(OLD.quantity, 0),
+                    unique_owners = unique_owners
+                        + (COALESCE(NEW.quantity, 0) > 0)::int
+                        - (COALESCE(OLD.quantity, 0) > 0)::int
+                WHERE card_id = NEW.card_id;
+            END IF;
+            RETURN NULL;
+        END IF;
+
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE cards SET
+                total_in_circulation = total_in_circulation - COALESCE(OLD.quantity, 0),
+                unique_owners = unique_owners - (COALESCE(OLD.quantity, 0) > 0)::int
+            WHERE card_id = OLD.card_id;
+        END IF;
+
+        IF TG_OP IN ('UPDATE', 'INSERT') THEN
+            UPDATE cards SET
+                total_in_circulation = total_in_circulation + COALESCE(NEW.quantity, 0),
+                unique_owners = unique_owners + (COALESCE(NEW.quantity, 0) > 0)::int
+            WHERE card_id = NEW.card_id;
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS trg_collections_circulation ON collections;
+
+    CREATE TRIGGER trg_collections_circulation
+    AFTER INSERT OR DELETE OR UPDATE OF quantity, card_id ON collections
+    FOR EACH ROW EXECUTE FUNCTION sync_card_circulation();
+
+    -- ========================================
+    -- 8d. Cache Invalidation Notifications
+    -- ========================================
+    -- users and groups are row-level: a statement-level INSERT trigger fires
+    -- for every INSERT ... ON CONFLICT, so each upsert would notify even when
+    -- no row is added. Catch counters are left to the cache TTLs.
+    -- cards stays statement-level so a bulk import sends one NOTIFY.
+
+    CREATE OR REPLACE FUNCTION notify_bot_invalidate() RETURNS TRIGGER AS $$
+    BEGIN
+        PERFORM pg_notify('bot_invalidate', TG_TABLE_NAME);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS trg_users_invalidate ON users;
+
+    CREATE TRIGGER trg_users_invalidate
+    AFTER INSERT OR DELETE ON users
+    FOR EACH ROW EXECUTE FUNCTION notify_bot_invalidate();
+
+    DROP TRIGGER IF EXISTS trg_groups_invalidate ON groups;
+
+    CREATE TRIGGER trg_groups_invalidate
+    AFTER INSERT OR DELETE ON groups
+    FOR EACH ROW EXECUTE FUNCTION notify_bot_invalidate();
+
+    DROP TRIGGER IF EXISTS trg_groups_active_invalidate ON groups;
+
+    CREATE TRIGGER trg_groups_active_invalidate
+    AFTER UPDATE OF is_active ON groups
+    FOR EACH ROW WHEN (OLD.is_active IS DISTINCT FROM NEW.is_active)
+    EXECUTE FUNCTION notify_bot_invalidate();
+
+    DROP TRIGGER IF EXISTS trg_cards_invalidate ON cards;
+
+    CREATE TRIGGER trg_cards_invalidate
+    AFTER INSERT OR DELETE OR UPDATE OF is_active, rarity, character_name, anime, photo_file_id ON cards
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_bot_invalidate();
+
+    -- ========================================
+    -- 9. Default Stats
+    -- ========================================
+    INSERT INTO stats (key, value) VALUES
+        ('total_trades', 0),
+        ('total_catches_today', 0),
+        ('total_spawns_today', 0)
+    ON CONFLICT (key) DO NOTHING;
+"""
+
+# Bump whenever SCHEMA_SQL changes; up-to-date databases skip the script
+SCHEMA_VERSION = 7
+
+SCHEMA_VERSION_TABLE_EXISTS_SQL = """
+    SELECT to_regclass('schema_version') IS NOT NULL
+"""
+
+SCHEMA_VERSION_SQL = """
+    SELECT pg_advisory_xact_lock(hashtext('schema_version'));
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER NOT NULL,
+        applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    );
+"""
+
+CIRCULATION_COUNTERS_EXIST_SQL = """
+    SELECT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'cards' AND column_name = 'total_in_circulation'
+    )
+"""
+
+COVERING_INDEX_EXISTS_SQL = """
+    SELECT EXISTS (
+        SELECT 1 FROM pg_constraint c
+        JOIN pg_index i ON i.indexrelid = c.conindid
+        WHERE c.conrelid = to_regclass('collections')
+          AND c.conname = 'collections_user_card_unique'
+          AND i.indnatts > i.indnkeyatts
+    )
+"""
+
+CIRCULATION_BACKFILL_SQL = """
+    UPDATE cards c SET
+        unique_owners = agg.unique_owners,
+        total_in_circulation = agg.total_in_circulation
+    FROM (
+        SELECT 
+            card_id,
+            COUNT(*) FILTER (WHERE quantity > 0) as unique_owners,
+            COALESCE(SUM(quantity), 0) as total_in_circulation
+        FROM collections
+        GROUP BY card_id
+    ) agg
+    WHERE c.card_id = agg.card_id
+"""
+
+
 async def init_db(pool: Optional[Pool] = None) -> bool:
     if not db.is_connected:
         log_database("⚠️ Cannot initialize schema - database not connected")
         return False
     
-    log_database("Initializing database schema...")
-    
     try:
-        # ========================================
-        # 1. Create Users Table
-        # ========================================
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                user_id BIGINT PRIMARY KEY,
-                username VARCHAR(255),
-                first_name VARCHAR(255),
-                last_name VARCHAR(255),
-                coins INTEGER DEFAULT 0,
-                xp INTEGER DEFAULT 0,
-                level INTEGER DEFAULT 1,
-                role VARCHAR(20) DEFAULT NULL,
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                is_banned BOOLEAN DEFAULT FALSE,
-                ban_reason TEXT,
-                total_catches INTEGER DEFAULT 0,
-                daily_streak INTEGER DEFAULT 0,
-                last_daily TIMESTAMP WITH TIME ZONE,
-                favorite_card_id INTEGER,
-                bio TEXT
-            )
-        """)
-        
-        # Add role column if not exists (for existing databases)
-        try:
-            await db.execute("""
-                ALTER TABLE users 
-                ADD COLUMN IF NOT EXISTS role VARCHAR(20) DEFAULT NULL
-            """)
-        except Exception:
-            pass
-        
-        log_database("✅ Users table ready")
-        
-        # ========================================
-        # 2. Create Cards Table
-        # ========================================
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS cards (
-                card_id SERIAL PRIMARY KEY,
-                anime VARCHAR(255) NOT NULL,
-                character_name VARCHAR(255) NOT NULL,
-                rarity INTEGER NOT NULL CHECK (rarity BETWEEN 1 AND 11),
-                photo_file_id TEXT NOT NULL,
-                uploader_id BIGINT,
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                is_active BOOLEAN DEFAULT TRUE,
-                total_caught INTEGER DEFAULT 0,
-                description TEXT,
-                tags TEXT[]
-            )
-        """)
-        log_database("✅ Cards table ready")
-        
-        # ========================================
-        # 3. Create Collections Table
-        # ========================================
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS collections (
-                collection_id SERIAL PRIMARY KEY,
-                user_id BIGINT NOT NULL,
-                card_id INTEGER NOT NULL,
-                caught_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                caught_in_group BIGINT,
-                is_favorite BOOLEAN DEFAULT FALSE,
-                trade_locked BOOLEAN DEFAULT FALSE,
-                quantity INTEGER DEFAULT 1
-            )
-        """)
-        log_database("✅ Collections table ready")
-        
-        # ========================================
-        # 4. Create Groups Table
-        # ========================================
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS groups (
-                group_id BIGINT PRIMARY KEY,
-                group_name VARCHAR(255),
-                is_active BOOLEAN DEFAULT TRUE,
-                spawn_enabled BOOLEAN DEFAULT TRUE,
-                cooldown_seconds INTEGER DEFAULT 60,
-                last_spawn TIMESTAMP WITH TIME ZONE,
-                current_card_id INTEGER,
-                current_card_message_id BIGINT,
-                total_spawns INTEGER DEFAULT 0,
-                total_catches INTEGER DEFAULT 0,
-                joined_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                settings JSONB DEFAULT '{}'::jsonb
-            )
-        """)
-        log_database("✅ Groups table ready")
-
-        # ========================================
-        # 4b. Drop System Migration (NEW)
-        # ========================================
-        try:
-            await db.execute("""
-                ALTER TABLE groups 
-                ADD COLUMN IF NOT EXISTS drop_threshold INTEGER DEFAULT 50,
-                ADD COLUMN IF NOT EXISTS drop_enabled BOOLEAN DEFAULT TRUE,
-                ADD COLUMN IF NOT EXISTS message_count INTEGER DEFAULT 0,
-                ADD COLUMN IF NOT EXISTS last_drop_at TIMESTAMP WITH TIME ZONE
-            """)
-        except Exception:
-            pass
-        
-        # Add image_url to cards if not exists
-        try:
-            await db.execute("""
-                ALTER TABLE cards 
-                ADD COLUMN IF NOT EXISTS image_url TEXT
-            """)
-        except Exception:
-            pass
-        
-        log_database("✅ Drop system columns ready")
-        
-        # ========================================
-        # 5. Create Trades Table
-        # ========================================
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS trades (
-                id SERIAL PRIMARY KEY,
-                from_user BIGINT NOT NULL,
-                to_user BIGINT NOT NULL,
-                offered_card_id INTEGER NOT NULL,
-                requested_card_id INTEGER,
-                status TEXT NOT NULL DEFAULT 'pending',
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                CONSTRAINT valid_status CHECK (status IN ('pending', 'accepted', 'rejected', 'cancelled', 'completed', 'failed')),
-                CONSTRAINT no_self_trade CHECK (from_user != to_user)
-            )
-        """)
-        log_database("✅ Trades table ready")
-        
-        # ========================================
-        # 6. Create Stats Table
-        # ========================================
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS stats (
-                id SERIAL PRIMARY KEY,
-                key TEXT UNIQUE NOT NULL,
-                value BIGINT DEFAULT 0,
-                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-            )
-        """)
-        log_database("✅ Stats table ready")
-        
-        # ========================================
-        # 7. Add Constraints
-        # ========================================
-        
-        try:
-            await db.execute("""
-                ALTER TABLE cards 
-                ADD CONSTRAINT cards_anime_character_unique 
-                UNIQUE (anime, character_name)
-            """)
-        except (DuplicateTableError, DuplicateObjectError, PostgresError):
-            pass
-        
-        try:
-            await db.execute("""
-                ALTER TABLE collections 
-                ADD CONSTRAINT collections_user_card_unique 
-                UNIQUE (user_id, card_id)
-            """)
-        except (DuplicateTableError, DuplicateObjectError, PostgresError):
-            pass
-        
-        try:
-            await db.execute("""
-                ALTER TABLE collections 
-                ADD CONSTRAINT fk_collections_user 
-                FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
-            """)
-        except (DuplicateTableError, DuplicateObjectError, PostgresError):
-            pass
-        
-        try:
-            await db.execute("""
-                ALTER TABLE collections 
-                ADD CONSTRAINT fk_collections_card 
-                FOREIGN KEY (card_id) REFERENCES cards(card_id) ON DELETE CASCADE
-            """)
-        except (DuplicateTableError, DuplicateObjectError, PostgresError):
-            pass
-        
-        try:
-            await db.execute("""
-                ALTER TABLE trades 
-                ADD CONSTRAINT fk_trades_from_user 
-                FOREIGN KEY (from_user) REFERENCES users(user_id) ON DELETE CASCADE
-            """)
-        except (DuplicateTableError, DuplicateObjectError, PostgresError):
-            pass
-        
-        try:
-            await db.execute("""
-                ALTER TABLE trades 
-                ADD CONSTRAINT fk_trades_to_user 
-                FOREIGN KEY (to_user) REFERENCES users(user_id) ON DELETE CASCADE
-            """)
-        except (DuplicateTableError, DuplicateObjectError, PostgresError):
-            pass
-        
-        try:
-            await db.execute("""
-                ALTER TABLE trades 
-                ADD CONSTRAINT fk_trades_offered_card 
-                FOREIGN KEY (offered_card_id) REFERENCES cards(card_id) ON DELETE CASCADE
-            """)
-        except (DuplicateTableError, DuplicateObjectError, PostgresError):
-            pass
-        
-        try:
-            await db.execute("""
-                ALTER TABLE trades 
-                ADD CONSTRAINT fk_trades_requested_card 
-                FOREIGN KEY (requested_card_id) REFERENCES cards(card_id) ON DELETE SET NULL
-            """)
-        except (DuplicateTableError, DuplicateObjectError, PostgresError):
-            pass
-        
-        log_database("✅ Constraints ready")
-        
-        # ========================================
-        # 8. Create Indexes
-        # ========================================
-        
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_collections_user_id 
-            ON collections(user_id)
-        """)
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_collections_card_id 
-            ON collections(card_id)
-        """)
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_cards_rarity 
-            ON cards(rarity)
-        """)
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_cards_anime 
-            ON cards(anime)
-        """)
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_cards_active 
-            ON cards(is_active) WHERE is_active = TRUE
-        """)
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_groups_active 
-            ON groups(is_active) WHERE is_active = TRUE
-        """)
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_users_banned 
-            ON users(is_banned) WHERE is_banned = FALSE
-        """)
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_users_role 
-            ON users(role) WHERE role IS NOT NULL
-        """)
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_trades_to_user 
-            ON trades(to_user)
-        """)
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_trades_from_user 
-            ON trades(from_user)
-        """)
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_trades_status 
-            ON trades(status)
-        """)
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_trades_pending 
-            ON trades(to_user, status) WHERE status = 'pending'
-        """)
-        
-        log_database("✅ Indexes ready")
-        
-        # ========================================
-        # 9. Insert Default Stats
-        # ========================================
-        await db.execute("""
-            INSERT INTO stats (key, value) VALUES
-                ('total_trades', 0),
-                ('total_catches_today', 0),
-                ('total_spawns_today', 0)
-            ON CONFLICT (key) DO NOTHING
-        """)
-        log_database("✅ Default stats inserted")
+        async with db.acquire() as conn:
+            if await conn.fetchval(SCHEMA_VERSION_TABLE_EXISTS_SQL):
+                current = await conn.fetchval("SELECT MAX(version) FROM schema_version")
+                if current is not None and current >= SCHEMA_VERSION:
+                    log_database("Database schema is up to date (v%d)", current)
+                    return True
+            
+            log_database("Initializing database schema...")
+            
+            async with conn.transaction():
+                # Serialize concurrent starts, then re-check under the lock
+                await conn.execute(SCHEMA_VERSION_SQL)
+                current = await conn.fetchval("SELECT MAX(version) FROM schema_version")
+                if current is not None and current >= SCHEMA_VERSION:
+                    return True
+                
+                # Backfill circulation counters only on the run that adds them
+                has_counters = await conn.fetchval(CIRCULATION_COUNTERS_EXIST_SQL)
+                has_covering_index = await conn.fetchval(COVERING_INDEX_EXISTS_SQL)
+                await conn.execute(SCHEMA_SQL)
+                if not has_counters:
+                    await conn.execute(CIRCULATION_BACKFILL_SQL)
+                await conn.execute(
+                    "INSERT INTO schema_version (version) VALUES ($1)", SCHEMA_VERSION
+                )
+            
+            # Set the visibility map and stats for the new index right away
+            # (VACUUM cannot run inside the transaction above)
+            if not has_covering_index:
+                await conn.execute("VACUUM ANALYZE collections")
         
         log_database("✅ Database schema initialized successfully")
         return True
@@ -514,17 +1063,9 @@ async def ensure_user(
     if not db.is_connected:
         return None
     
-    query = """
-        INSERT INTO users (user_id, username, first_name, last_name)
-        VALUES ($1, $2, $3, $4)
-        ON CONFLICT (user_id) DO UPDATE SET
-            username = COALESCE($2, users.username),
-            first_name = COALESCE($3, users.first_name),
-            last_name = COALESCE($4, users.last_name),
-            updated_at = NOW()
-        RETURNING *
-    """
-    return await db.fetchrow(query, user_id, username, first_name, last_name)
+    return await db.fetchrow_prepared(
+        "ensure_user", user_id, username, first_name, last_name
+    )
 
 
 async def get_user_by_id(
@@ -534,8 +1075,7 @@ async def get_user_by_id(
     if not db.is_connected:
         return None
     
-    query = "SELECT * FROM users WHERE user_id = $1"
-    return await db.fetchrow(query, user_id)
+    return await db.fetchrow_prepared("user_by_id", user_id)
 
 
 async def update_user_stats(
@@ -548,16 +1088,9 @@ async def update_user_stats(
     if not db.is_connected:
         return None
     
-    query = """
-        UPDATE users SET
-            coins = coins + $2,
-            xp = xp + $3,
-            total_catches = total_catches + $4,
-            updated_at = NOW()
-        WHERE user_id = $1
-        RETURNING *
-    """
-    return await db.fetchrow(query, user_id, coins_delta, xp_delta, catches_delta)
+    return await db.fetchrow_prepared(
+        "update_user_stats", user_id, coins_delta, xp_delta, catches_delta
+    )
 
 
 async def get_user_leaderboard(
@@ -586,10 +1119,19 @@ async def get_all_users(pool: Optional[Pool]) -> List[Record]:
     if not db.is_connected:
         return []
     
-    query = "SELECT * FROM users WHERE is_banned = FALSE"
+    query = f"SELECT {USER_COLUMNS} FROM users WHERE is_banned = FALSE"
     return await db.fetch(query)
 
 
+async def get_active_user_ids(pool: Optional[Pool]) -> List[int]:
+    """Ids only, aggregated server-side so thousands of users decode as one array."""
+    if not db.is_connected:
+        return []
+    
+    query = "SELECT COALESCE(array_agg(user_id), '{}') FROM users WHERE is_banned = FALSE"
+    return await db.fetchval(query)
+
+
 # ============================================================
 # 🎴 Card Operations
 # ============================================================
@@ -604,21 +1146,93 @@ async def add_card(
     description: Optional[str] = None,
     tags: Optional[List[str]] = None
 ) -> Optional[Record]:
+    """
+    Add a card unless one with the same anime and character already exists.
+    The check isn't backed by a unique constraint (uploads drop it), so two
+    concurrent calls for the same character can both insert.
+    """
     if not db.is_connected:
         return None
 
     if not 1 <= rarity <= 11:
         raise ValueError(f"Invalid rarity: {rarity}. Must be between 1 and 11.")
 
+    # The (anime, character_name) constraint is dropped once uploads run,
+    # so skip existing characters explicitly rather than via ON CONFLICT.
+    # Casts pin each parameter to its column type: $1 and $2 are also
+    # compared below, and Postgres can't infer one type for both uses.
     query = """
         INSERT INTO cards (anime, character_name, rarity, photo_file_id, uploader_id, description, tags)
-        VALUES ($1, $2, $3, $4, $5, $6, $7)
-        ON CONFLICT (anime, character_name) DO NOTHING
+        SELECT $1::varchar, $2::varchar, $3::int, $4::text, $5::bigint, $6::text, $7::text[]
+        WHERE NOT EXISTS (
+            SELECT 1 FROM cards WHERE anime = $1 AND character_name = $2
+        )
         RETURNING *
     """
-    return await db.fetchrow(
+    row = await db.fetchrow(
         query, anime, character, rarity, photo_file_id, uploader_id, description, tags or []
     )
+    if row:
+        invalidate_query_cache()
+        invalidate_card_pool()
+    return row
+
+
+CARD_IMPORT_COLUMNS = [
+    "anime", "character_name", "rarity", "photo_file_id", "uploader_id", "description", "tags"
+]
+
+
+async def add_cards_bulk(
+    pool: Optional[Pool],
+    cards: List[tuple]
+) -> int:
+    """
+    Insert many cards in one go via COPY.
+    Each tuple follows CARD_IMPORT_COLUMNS; duplicates are skipped as in add_card.
+    """
+    if not db.is_connected or not cards:
+        return 0
+
+    for card in cards:
+        if not 1 <= card[2] <= 11:
+            raise ValueError(f"Invalid rarity: {card[2]}. Must be between 1 and 11.")
+
+    records = [(*card[:6], card[6] or []) for card in cards]
+    columns = ", ".join(CARD_IMPORT_COLUMNS)
+
+    async with db.acquire() as conn:
+        async with conn.transaction():
+            # COPY can't skip duplicates, so stage the rows and insert the new ones
+            await conn.execute("""
+                CREATE TEMP TABLE cards_import (
+                    anime VARCHAR(255),
+                    character_name VARCHAR(255),
+                    rarity INTEGER,
+                    photo_file_id TEXT,
+                    uploader_id BIGINT,
+                    description TEXT,
+                    tags TEXT[]
+                ) ON COMMIT DROP
+            """)
+            await conn.copy_records_to_table(
+                "cards_import", records=records, columns=CARD_IMPORT_COLUMNS
+            )
+            status = await conn.execute(f"""
+                INSERT INTO cards ({columns})
+                SELECT DISTINCT ON (anime, character_name) {columns}
+                FROM cards_import i
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM cards c
+                    WHERE c.anime = i.anime AND c.character_name = i.character_name
+                )
+            """)
+
+    inserted = int(status.split()[-1])
+    if inserted:
+        invalidate_query_cache()
+        invalidate_card_pool()
+    return inserted
 
 
 async def get_card_by_id(
@@ -628,8 +1242,13 @@ async def get_card_by_id(
     if not db.is_connected:
         return None
 
-    query = "SELECT * FROM cards WHERE card_id = $1 AND is_active = TRUE"
-    return await db.fetchrow(query, card_id)
+    await _load_card_catalog()
+    card = _card_catalog.get(card_id)
+    if card is not None:
+        return card
+
+    # Not in the snapshot yet (e.g. uploaded by another instance)
+    return await db.fetchrow_prepared("card_details", card_id)
 
 
 async def get_cards_by_ids(
@@ -639,12 +1258,77 @@ async def get_cards_by_ids(
     if not db.is_connected or not card_ids:
         return []
 
-    query = """
-        SELECT * FROM cards 
-        WHERE card_id = ANY($1) AND is_active = TRUE
-        ORDER BY rarity DESC, character_name
-    """
-    return await db.fetch(query, card_ids)
+    await _load_card_catalog()
+    wanted = set(card_ids)
+    cards = [_card_catalog[i] for i in wanted if i in _card_catalog]
+    missing = [i for i in wanted if i not in _card_catalog]
+
+    if missing:
+        query = f"""
+            SELECT {CARD_COLUMNS} FROM cards 
+            WHERE card_id = ANY($1) AND is_active = TRUE
+        """
+        cards.extend(await db.fetch(query, missing))
+
+    cards.sort(key=lambda c: (-c["rarity"], c["character_name"]))
+    return cards
+
+
+# Snapshot of active cards: spawns and card lookups read it instead of the table
+CARD_POOL_TTL = 300
+_card_catalog: dict[int, Record] = {}
+_card_search_text: dict[int, str] = {}
+_card_pool: dict[Optional[int], list[int]] = {}
+_card_pool_expires_at = 0.0
+_card_catalog_lock = asyncio.Lock()
+
+
+def invalidate_card_pool() -> None:
+    """Reload the card snapshot on next use after cards are added or changed."""
+    global _card_pool_expires_at
+    _card_pool_expires_at = 0.0
+
+
+async def _load_card_catalog() -> None:
+    global _card_catalog, _card_search_text, _card_pool, _card_pool_expires_at
+
+    if _card_pool_expires_at > time.monotonic():
+        return
+
+    async with _card_catalog_lock:
+        # Another caller may have reloaded it while we waited
+        if _card_pool_expires_at > time.monotonic():
+            return
+
+        rows = await db.fetch(
+            f"SELECT {CARD_COLUMNS} FROM cards WHERE is_active = TRUE ORDER BY card_id"
+        )
+        card_catalog: dict[int, Record] = {}
+        card_search_text: dict[int, str] = {}
+        card_pool: dict[Optional[int], list[int]] = {None: []}
+        for row in rows:
+            card_catalog[row["card_id"]] = row
+            card_search_text[row["card_id"]] = f"{row['character_name']}\n{row['anime']}".lower()
+            card_pool.setdefault(row["rarity"], []).append(row["card_id"])
+            card_pool[None].append(row["card_id"])
+        _card_catalog = card_catalog
+        _card_search_text = card_search_text
+        _card_pool = card_pool
+        _card_pool_expires_at = time.monotonic() + CARD_POOL_TTL
+
+
+async def warm_card_catalog() -> int:
+    """Load the card snapshot up front so the first spawn doesn't wait on it."""
+    if not db.is_connected:
+        return 0
+
+    try:
+        await _load_card_catalog()
+        log_database("Card catalog loaded (%d active cards)", len(_card_catalog))
+        return len(_card_catalog)
+    except Exception as e:
+        error_logger.error(f"Failed to load card catalog: {e}")
+        return 0
 
 
 async def get_random_card(
@@ -654,22 +1338,37 @@ async def get_random_card(
     if not db.is_connected:
         return None
 
-    if rarity:
-        query = """
-            SELECT * FROM cards 
-            WHERE is_active = TRUE AND rarity = $1
-            ORDER BY RANDOM() 
-            LIMIT 1
-        """
-        return await db.fetchrow(query, rarity)
-    else:
-        query = """
-            SELECT * FROM cards 
-            WHERE is_active = TRUE
-            ORDER BY RANDOM() 
-            LIMIT 1
-        """
-        return await db.fetchrow(query)
+    await _load_card_catalog()
+    card_ids = _card_pool.get(rarity or None)
+    if not card_ids:
+        return None
+
+    return _card_catalog[random.choice(card_ids)]
+
+
+async def search_card_catalog(
+    pool: Optional[Pool],
+    search_term: Optional[str] = None,
+    rarity: Optional[int] = None,
+    offset: int = 0,
+    limit: int = 50
+) -> List[Record]:
+    """
+    Page through active cards in card_id order without a query, optionally
+    filtered by rarity and a case-insensitive name or anime substring.
+    """
+    if not db.is_connected:
+        return []
+
+    await _load_card_catalog()
+    cards = iter(_card_catalog.values())
+    if rarity is not None:
+        cards = (c for c in cards if c["rarity"] == rarity)
+    if search_term:
+        term = search_term.lower()
+        cards = (c for c in cards if term in _card_search_text[c["card_id"]])
+
+    return list(itertools.islice(cards, offset, offset + limit))
 
 
 async def search_cards(
@@ -680,8 +1379,8 @@ async def search_cards(
     if not db.is_connected:
         return []
 
-    query = """
-        SELECT * FROM cards
+    query = f"""
+        SELECT {CARD_COLUMNS} FROM cards
         WHERE is_active = TRUE
           AND (
             anime ILIKE $1 
@@ -698,9 +1397,8 @@ async def get_card_count(pool: Optional[Pool]) -> int:
     if not db.is_connected:
         return 0
 
-    query = "SELECT COUNT(*) FROM cards WHERE is_active = TRUE"
-    result = await db.fetchval(query)
-    return result or 0
+    await _load_card_catalog()
+    return len(_card_catalog)
 
 
 async def increment_card_caught(
@@ -710,8 +1408,7 @@ async def increment_card_caught(
     if not db.is_connected:
         return
 
-    query = "UPDATE cards SET total_caught = total_caught + 1 WHERE card_id = $1"
-    await db.execute(query, card_id)
+    await db.execute_prepared("increment_card_caught", card_id)
 
 
 async def delete_card(
@@ -723,6 +1420,8 @@ async def delete_card(
 
     query = "UPDATE cards SET is_active = FALSE WHERE card_id = $1 RETURNING card_id"
     result = await db.fetchrow(query, card_id)
+    invalidate_query_cache()
+    invalidate_card_pool()
     return result is not None
 
 
@@ -739,15 +1438,67 @@ async def add_to_collection(
     if not db.is_connected:
         return None
 
+    row = await db.fetchrow_prepared("add_to_collection", user_id, card_id, group_id)
+    if row:
+        _note_card_added(user_id, card_id)
+    return row
+
+
+async def give_cards_to_users(
+    pool: Optional[Pool],
+    grants: List[tuple],
+    group_id: Optional[int] = None
+) -> int:
+    """
+    Add many (user_id, card_id) pairs to collections in one statement.
+    Repeated pairs stack into a single row's quantity. Returns rows written.
+    """
+    if not db.is_connected or not grants:
+        return 0
+
+    user_ids = [user_id for user_id, _ in grants]
+    card_ids = [card_id for _, card_id in grants]
+
     query = """
-        INSERT INTO collections (user_id, card_id, caught_in_group)
-        VALUES ($1, $2, $3)
+        INSERT INTO collections (user_id, card_id, quantity, caught_in_group)
+        SELECT g.user_id, g.card_id, COUNT(*), $3
+        FROM unnest($1::bigint[], $2::int[]) AS g(user_id, card_id)
+        GROUP BY g.user_id, g.card_id
         ON CONFLICT (user_id, card_id) DO UPDATE SET
-            quantity = collections.quantity + 1,
+            quantity = collections.quantity + EXCLUDED.quantity,
             caught_at = NOW()
-        RETURNING *
     """
-    return await db.fetchrow(query, user_id, card_id, group_id)
+    status = await db.execute(query, user_ids, card_ids, group_id)
+
+    for user_id, card_id in set(grants):
+        _note_card_added(user_id, card_id)
+    return int(status.split()[-1])
+
+
+async def apply_catch(
+    pool: Optional[Pool],
+    user_id: int,
+    card_id: int,
+    group_id: Optional[int] = None,
+    coins_delta: int = 0,
+    xp_delta: int = 0,
+    username: Optional[str] = None,
+    first_name: Optional[str] = None
+) -> Optional[Record]:
+    """
+    Record a catch: upsert the catcher with rewards, add the card to their
+    collection and bump the card and group catch counters, all in one statement.
+    """
+    if not db.is_connected:
+        return None
+
+    row = await db.fetchrow_prepared(
+        "apply_catch",
+        user_id, card_id, group_id, username, first_name, coins_delta, xp_delta
+    )
+    if row:
+        _note_card_added(user_id, card_id)
+    return row
 
 
 async def get_user_collection(
@@ -762,42 +1513,58 @@ async def get_user_collection(
 
     offset = (page - 1) * per_page
 
+    # Separate statements with and without the filter: a cached generic plan
+    # for a "$n IS NULL OR ..." predicate can't drop the unused branch.
+    # Each row carries the filtered total, so one query serves page and count.
     if rarity_filter:
-        count_query = """
-            SELECT COUNT(*) FROM collections c
+        query = """
+            SELECT c.collection_id, c.user_id, c.card_id, c.quantity, c.caught_at, c.is_favorite,
+                   ca.anime, ca.character_name, ca.rarity, ca.photo_file_id,
+                   COUNT(*) OVER() AS total_count
+            FROM collections c
             JOIN cards ca ON c.card_id = ca.card_id
-            WHERE c.user_id = $1 AND ca.rarity = $2 AND ca.is_active = TRUE
+            WHERE c.user_id = $1 AND ca.is_active = TRUE
+              AND ca.rarity = $4
+            ORDER BY ca.rarity DESC, ca.character_name
+            LIMIT $2 OFFSET $3
         """
-        main_query = """
-            SELECT c.*, ca.anime, ca.character_name, ca.rarity, 
-                   ca.photo_file_id, ca.description
+        cards = await db.fetch(query, user_id, per_page, offset, rarity_filter)
+    else:
+        query = """
+            SELECT c.collection_id, c.user_id, c.card_id, c.quantity, c.caught_at, c.is_favorite,
+                   ca.anime, ca.character_name, ca.rarity, ca.photo_file_id,
+                   COUNT(*) OVER() AS total_count
             FROM collections c
             JOIN cards ca ON c.card_id = ca.card_id
-            WHERE c.user_id = $1 AND ca.rarity = $4 AND ca.is_active = TRUE
+            WHERE c.user_id = $1 AND ca.is_active = TRUE
             ORDER BY ca.rarity DESC, ca.character_name
             LIMIT $2 OFFSET $3
         """
-        total = await db.fetchval(count_query, user_id, rarity_filter)
-        cards = await db.fetch(main_query, user_id, per_page, offset, rarity_filter)
-    else:
+        cards = await db.fetch(query, user_id, per_page, offset)
+
+    if cards:
+        return cards, cards[0]["total_count"]
+
+    if offset == 0:
+        return [], 0
+
+    # Page past the end: the window has no rows to report the total on
+    if rarity_filter:
         count_query = """
             SELECT COUNT(*) FROM collections c
             JOIN cards ca ON c.card_id = ca.card_id
             WHERE c.user_id = $1 AND ca.is_active = TRUE
+              AND ca.rarity = $2
         """
-        main_query = """
-            SELECT c.*, ca.anime, ca.character_name, ca.rarity, 
-                   ca.photo_file_id, ca.description
-            FROM collections c
+        total = await db.fetchval(count_query, user_id, rarity_filter)
+    else:
+        count_query = """
+            SELECT COUNT(*) FROM collections c
             JOIN cards ca ON c.card_id = ca.card_id
             WHERE c.user_id = $1 AND ca.is_active = TRUE
-            ORDER BY ca.rarity DESC, ca.character_name
-            LIMIT $2 OFFSET $3
         """
         total = await db.fetchval(count_query, user_id)
-        cards = await db.fetch(main_query, user_id, per_page, offset)
-
-    return cards, total or 0
+    return [], total or 0
 
 
 async def get_user_collection_stats(
@@ -848,13 +1615,20 @@ async def check_user_has_card(
     if not db.is_connected:
         return False
 
-    query = """
-        SELECT EXISTS(
-            SELECT 1 FROM collections 
-            WHERE user_id = $1 AND card_id = $2
-        )
-    """
-    return await db.fetchval(query, user_id, card_id)
+    return card_id in await _get_owned_cards(user_id)
+
+
+async def clear_user_collection(
+    pool: Optional[Pool],
+    user_id: int
+) -> int:
+    """Delete every card a user owns and drop their cached counts and owned cards."""
+    if not db.is_connected:
+        return 0
+
+    status = await db.execute("DELETE FROM collections WHERE user_id = $1", user_id)
+    invalidate_collection_count(user_id)
+    return int(status.split()[-1])
 
 
 async def toggle_favorite(
@@ -897,6 +1671,7 @@ async def ensure_group(
     return await db.fetchrow(query, group_id, group_name)
 
 
+@async_ttl_cache(ttl=60)
 async def get_all_groups(
     pool: Optional[Pool],
     active_only: bool = True
@@ -905,13 +1680,31 @@ async def get_all_groups(
         return []
 
     if active_only:
-        query = "SELECT * FROM groups WHERE is_active = TRUE ORDER BY joined_at"
+        query = f"SELECT {GROUP_COLUMNS} FROM groups WHERE is_active = TRUE ORDER BY joined_at"
     else:
-        query = "SELECT * FROM groups ORDER BY joined_at"
+        query = f"SELECT {GROUP_COLUMNS} FROM groups ORDER BY joined_at"
 
     return await db.fetch(query)
 
 
+@async_ttl_cache(ttl=60)
+async def get_active_group_ids(pool: Optional[Pool]) -> List[int]:
+    """
+    Ids only, aggregated server-side so every group decodes as one array.
+    Skips groups quiet for longer than Config.NOTIFY_ACTIVE_WITHIN_DAYS.
+    """
+    if not db.is_connected:
+        return []
+
+    query = """
+        SELECT COALESCE(array_agg(group_id ORDER BY joined_at), '{}')
+        FROM groups
+        WHERE is_active = TRUE
+          AND ($1 <= 0 OR last_seen > NOW() - make_interval(days => $1))
+    """
+    return await db.fetchval(query, Config.NOTIFY_ACTIVE_WITHIN_DAYS)
+
+
 async def get_group_by_id(
     pool: Optional[Pool],
     group_id: int
@@ -1009,46 +1802,59 @@ async def deactivate_group(
 # 📊 Statistics & Analytics
 # ============================================================
 
-async def get_global_stats(pool: Optional[Pool]) -> dict:
-    if not db.is_connected:
-        return {
-            "total_users": 0,
-            "total_cards": 0,
-            "total_catches": 0,
-            "active_groups": 0,
-        }
+@async_ttl_cache(ttl=30)
+async def _fetch_global_stats(pool: Optional[Pool]) -> dict:
+    # One round trip for all four counters; the timeout keeps a slow
+    # stats page from holding its connection.
+    row = await asyncio.wait_for(
+        db.fetchrow("""
+            SELECT
+                u.total_users,
+                (SELECT COUNT(*) FROM cards WHERE is_active = TRUE) AS total_cards,
+                u.total_catches,
+                (SELECT COUNT(*) FROM groups WHERE is_active = TRUE) AS active_groups
+            FROM (
+                SELECT COUNT(*) AS total_users, COALESCE(SUM(total_catches), 0) AS total_catches
+                FROM users
+            ) u
+        """),
+        timeout=2.0,
+    )
 
-    try:
-        stats = {}
+    return {
+        "total_users": row["total_users"] or 0,
+        "total_cards": row["total_cards"] or 0,
+        "total_catches": int(row["total_catches"] or 0),
+        "active_groups": row["active_groups"] or 0,
+    }
 
-        stats["total_users"] = await db.fetchval(
-            "SELECT COUNT(*) FROM users"
-        ) or 0
 
-        stats["total_cards"] = await db.fetchval(
-            "SELECT COUNT(*) FROM cards WHERE is_active = TRUE"
-        ) or 0
+async def get_global_stats(pool: Optional[Pool]) -> dict:
+    empty = {
+        "total_users": 0,
+        "total_cards": 0,
+        "total_catches": 0,
+        "active_groups": 0,
+    }
 
-        stats["total_catches"] = int(await db.fetchval(
-            "SELECT COALESCE(SUM(total_catches), 0) FROM users"
-        ) or 0)
+    if not db.is_connected:
+        return empty
 
-        stats["active_groups"] = await db.fetchval(
-            "SELECT COUNT(*) FROM groups WHERE is_active = TRUE"
-        ) or 0
+    # The fallback is returned here, outside the cache, so a failed
+    # query is retried on the next call instead of showing zeros for the TTL
+    try:
+        return await _fetch_global_stats(pool)
 
-        return stats
+    except asyncio.TimeoutError:
+        error_logger.error("Global stats queries timed out")
+        return empty
 
     except Exception as e:
         error_logger.error(f"Error getting global stats: {e}")
-        return {
-            "total_users": 0,
-            "total_cards": 0,
-            "total_catches": 0,
-            "active_groups": 0,
-        }
+        return empty
 
 
+@async_ttl_cache(ttl=300)
 async def get_rarity_distribution(pool: Optional[Pool]) -> List[Record]:
     if not db.is_connected:
         return []
@@ -1070,16 +1876,48 @@ async def get_top_catchers(
     if not db.is_connected:
         return []
 
-    query = """
-        SELECT user_id, username, first_name, total_catches, level, coins
-        FROM users
-        WHERE is_banned = FALSE AND total_catches > 0
-        ORDER BY total_catches DESC
-        LIMIT $1
-    """
-    return await db.fetch(query, limit)
+    return await db.fetch_prepared("top_catchers", limit)
+
+
+async def refresh_top_catchers(pool: Optional[Pool]) -> bool:
+    if not db.is_connected:
+        return False
+
+    try:
+        await db.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_top_catchers")
+        return True
+    except Exception as e:
+        error_logger.error(f"Error refreshing top catchers: {e}")
+        return False
+
+
+async def _ping_idle_connection() -> None:
+    async with db.pool.acquire() as conn:
+        await conn.execute("SELECT 1")
+
+
+async def run_pool_keepalive(interval: int = 60) -> None:
+    """Periodically touch idle pooled connections so proxies don't drop them."""
+    while True:
+        await asyncio.sleep(interval)
+        if not db.is_connected:
+            continue
+        try:
+            await asyncio.gather(
+                *(_ping_idle_connection() for _ in range(db.pool.get_idle_size()))
+            )
+        except Exception as e:
+            error_logger.error(f"Pool keepalive failed: {e}")
 
 
+async def run_leaderboard_refresher(interval: int = 120) -> None:
+    """Periodically refresh the leaderboard view until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        await refresh_top_catchers(None)
+
+
+@async_ttl_cache(ttl=120)
 async def get_rarest_cards(
     pool: Optional[Pool],
     limit: int = 10
@@ -1087,8 +1925,8 @@ async def get_rarest_cards(
     if not db.is_connected:
         return []
 
-    query = """
-        SELECT * FROM cards
+    query = f"""
+        SELECT {CARD_COLUMNS} FROM cards
         WHERE is_active = TRUE
         ORDER BY rarity DESC, total_caught ASC
         LIMIT $1
@@ -1107,14 +1945,17 @@ async def cleanup_inactive_groups(
     if not db.is_connected:
         return 0
 
-    query = f"""
+    if not isinstance(days_inactive, int) or days_inactive < 1:
+        raise ValueError(f"Invalid days_inactive: {days_inactive!r}. Must be a positive integer.")
+
+    query = """
         UPDATE groups SET is_active = FALSE
-        WHERE last_spawn < NOW() - INTERVAL '{days_inactive} days'
+        WHERE last_spawn < NOW() - ($1 * INTERVAL '1 day')
           AND is_active = TRUE
-        RETURNING group_id
     """
-    result = await db.fetch(query)
-    return len(result)
+    # Command tag is "UPDATE <n>"; no rows need decoding just to be counted
+    status = await db.execute(query, days_inactive)
+    return int(status.split()[-1])
 
 
 async def health_check(pool: Optional[Pool]) -> bool:
@@ -1122,37 +1963,47 @@ async def health_check(pool: Optional[Pool]) -> bool:
         return False
 
     try:
-        await db.fetchval("SELECT 1")
+        # A wedged database must not park the probe on a pooled connection
+        await asyncio.wait_for(db.fetchval("SELECT 1"), timeout=1.0)
         return True
+    except asyncio.TimeoutError:
+        error_logger.error("Database health check timed out")
+        return False
     except Exception as e:
         error_logger.error(f"Database health check failed: {e}")
         return False
 
 
+@async_ttl_cache(ttl=600)
+async def _fetch_database_size(pool: Optional[Pool]) -> Optional[str]:
+    query = "SELECT pg_size_pretty(pg_database_size(current_database()))"
+    return await db.fetchval(query)
+
+
 async def get_database_size(pool: Optional[Pool]) -> Optional[str]:
     if not db.is_connected:
         return None
 
     try:
-        query = "SELECT pg_size_pretty(pg_database_size(current_database()))"
-        return await db.fetchval(query)
+        return await _fetch_database_size(pool)
     except Exception:
         return None
 
 
-async def get_table_counts(pool: Optional[Pool]) -> dict:
+async def get_table_counts(
+    pool: Optional[Pool],
+    tables: tuple = ("users", "cards", "collections", "groups", "trades")
+) -> dict:
     if not db.is_connected:
         return {}
 
     try:
-        return {
-            "users": await db.fetchval("SELECT COUNT(*) FROM users") or 0,
-            "cards": await db.fetchval("SELECT COUNT(*) FROM cards") or 0,
-            "collections": await db.fetchval("SELECT COUNT(*) FROM collections") or 0,
-            "groups": await db.fetchval("SELECT COUNT(*) FROM groups") or 0,
-            "trades": await db.fetchval("SELECT COUNT(*) FROM trades") or 0,
-        }
-    except Exception:
+        counts = await asyncio.gather(
+            *(db.fetchval(f"SELECT COUNT(*) FROM {table}") for table in tables)
+        )
+        return {table: count or 0 for table, count in zip(tables, counts)}
+    except Exception as e:
+        error_logger.error(f"Error getting table counts: {e}")
         return {}
 
 
@@ -1172,57 +2023,70 @@ async def get_collection_cards(
 
     try:
         if rarity_filter:
-            query = """
-                SELECT 
-                    c.collection_id,
-                    c.user_id,
-                    c.card_id,
-                    c.quantity,
-                    c.caught_at,
-                    c.is_favorite,
-                    ca.anime,
-                    ca.character_name,
-                    ca.rarity,
-                    ca.photo_file_id,
-                    ca.total_caught
-                FROM collections c
-                JOIN cards ca ON c.card_id = ca.card_id
-                WHERE c.user_id = $1 
-                  AND ca.is_active = TRUE 
-                  AND ca.rarity = $4
-                  AND c.quantity > 0
-                ORDER BY ca.rarity DESC, ca.character_name ASC
-                LIMIT $2 OFFSET $3
-            """
-            return await db.fetch(query, user_id, limit, offset, rarity_filter)
+            rows = await db.fetch_prepared(
+                "collection_cards_by_rarity", user_id, limit, offset, rarity_filter
+            )
         else:
-            query = """
-                SELECT 
-                    c.collection_id,
-                    c.user_id,
-                    c.card_id,
-                    c.quantity,
-                    c.caught_at,
-                    c.is_favorite,
-                    ca.anime,
-                    ca.character_name,
-                    ca.rarity,
-                    ca.photo_file_id,
-                    ca.total_caught
-                FROM collections c
-                JOIN cards ca ON c.card_id = ca.card_id
-                WHERE c.user_id = $1 
-                  AND ca.is_active = TRUE
-                  AND c.quantity > 0
-                ORDER BY ca.rarity DESC, ca.character_name ASC
-                LIMIT $2 OFFSET $3
-            """
-            return await db.fetch(query, user_id, limit, offset)
+            rows = await db.fetch_prepared("collection_cards", user_id, limit, offset)
+
+        # Every row carries the filtered total, so the count comes for free
+        if rows:
+            _store_collection_count(user_id, rarity_filter, rows[0]["total_count"])
+        return rows
     except Exception as e:
         error_logger.error(f"Error getting collection cards: {e}", exc_info=True)
         return []
 
 
+# Per-user collection counts, user_id -> {rarity_filter: (count, expires_at)},
+# evicted least-recently-used first like the owned-card sets below
+COLLECTION_COUNT_TTL = 30
+COLLECTION_COUNT_MAX_USERS = 5000
+_collection_count_cache: "OrderedDict[int, dict[Optional[int], tuple[int, float]]]" = OrderedDict()
+
+
+def _store_collection_count(user_id: int, rarity_filter: Optional[int], count: int) -> None:
+    counts = _collection_count_cache.setdefault(user_id, {})
+    counts[rarity_filter or None] = (count, time.monotonic() + COLLECTION_COUNT_TTL)
+    _collection_count_cache.move_to_end(user_id)
+    if len(_collection_count_cache) > COLLECTION_COUNT_MAX_USERS:
+        _collection_count_cache.popitem(last=False)
+
+
+# Card ids owned by recently active users, evicted least-recently-used first
+OWNED_CARDS_MAX_USERS = 5000
+_owned_cards: "OrderedDict[int, set[int]]" = OrderedDict()
+
+
+def invalidate_collection_count(user_id: int) -> None:
+    """Drop cached collection counts and owned cards for a user after their collection changes."""
+    _collection_count_cache.pop(user_id, None)
+    _owned_cards.pop(user_id, None)
+
+
+def _note_card_added(user_id: int, card_id: int) -> None:
+    # Keep a cached owned-card set current rather than reloading it next catch
+    owned = _owned_cards.get(user_id)
+    invalidate_collection_count(user_id)
+    if owned is not None:
+        owned.add(card_id)
+        _owned_cards[user_id] = owned
+
+
+async def _get_owned_cards(user_id: int) -> set[int]:
+    owned = _owned_cards.get(user_id)
+    if owned is not None:
+        _owned_cards.move_to_end(user_id)
+        return owned
+
+    rows = await db.fetch_prepared("user_card_ids", user_id)
+    owned = {row["card_id"] for row in rows}
+    _owned_cards[user_id] = owned
+    if len(_owned_cards) > OWNED_CARDS_MAX_USERS:
+        _owned_cards.popitem(last=False)
+    return owned
+
+
 async def get_collection_count(
     pool: Optional[Pool],
     user_id: int,
@@ -1231,6 +2095,11 @@ async def get_collection_count(
     if not db.is_connected:
         return 0
 
+    cached = _collection_count_cache.get(user_id, {}).get(rarity_filter or None)
+    if cached and cached[1] > time.monotonic():
+        _collection_count_cache.move_to_end(user_id)
+        return cached[0]
+
     try:
         if rarity_filter:
             query = """
@@ -1252,7 +2121,9 @@ async def get_collection_count(
             """
             result = await db.fetchval(query, user_id)
 
-        return result or 0
+        count = result or 0
+        _store_collection_count(user_id, rarity_filter, count)
+        return count
     except Exception as e:
         error_logger.error(f"Error getting collection count: {e}", exc_info=True)
         return 0
@@ -1266,15 +2137,8 @@ async def get_card_with_details(
         return None
 
     try:
-        query = """
-            SELECT 
-                c.*,
-                (SELECT COUNT(DISTINCT user_id) FROM collections WHERE card_id = c.card_id AND quantity > 0) as unique_owners,
-                (SELECT COALESCE(SUM(quantity), 0) FROM collections WHERE card_id = c.card_id) as total_in_circulation
-            FROM cards c
-            WHERE c.card_id = $1 AND c.is_active = TRUE
-        """
-        return await db.fetchrow(query, card_id)
+        # unique_owners / total_in_circulation are maintained by trg_collections_circulation
+        return await db.fetchrow_prepared("card_details", card_id)
     except Exception as e:
         error_logger.error(f"Error getting card details: {e}", exc_info=True)
         return None
@@ -1289,21 +2153,7 @@ async def get_card_owners(
         return []
 
     try:
-        query = """
-            SELECT 
-                u.user_id, 
-                u.first_name, 
-                u.username, 
-                c.quantity,
-                c.caught_at,
-                c.is_favorite
-            FROM collections c
-            JOIN users u ON c.user_id = u.user_id
-            WHERE c.card_id = $1 AND c.quantity > 0
-            ORDER BY c.quantity DESC, c.caught_at ASC
-            LIMIT $2
-        """
-        return await db.fetch(query, card_id, limit)
+        return await db.fetch_prepared("card_owners", card_id, limit)
     except Exception as e:
         error_logger.error(f"Error getting card owners: {e}", exc_info=True)
         return []
@@ -1319,11 +2169,10 @@ async def check_user_owns_card(
         return False
 
     try:
-        query = """
-            SELECT quantity FROM collections
-            WHERE user_id = $1 AND card_id = $2
-        """
-        result = await db.fetchval(query, user_id, card_id)
+        if min_quantity <= 1:
+            return bool(await db.fetchval_prepared("user_owns_card", user_id, card_id))
+
+        result = await db.fetchval_prepared("user_card_qty", user_id, card_id)
         return (result or 0) >= min_quantity
     except Exception as e:
         error_logger.error(f"Error checking card ownership: {e}", exc_info=True)
@@ -1339,8 +2188,7 @@ async def get_user_card_quantity(
         return 0
 
     try:
-        query = "SELECT quantity FROM collections WHERE user_id = $1 AND card_id = $2"
-        result = await db.fetchval(query, user_id, card_id)
+        result = await db.fetchval_prepared("user_card_qty", user_id, card_id)
         return result or 0
     except Exception as e:
         error_logger.error(f"Error getting card quantity: {e}", exc_info=True)
@@ -1351,6 +2199,13 @@ async def get_user_card_quantity(
 # 🔄 Trade Functions
 # ============================================================
 
+def _runner(pool: Union[Pool, Connection, None]) -> Union[Connection, "Database"]:
+    """Use a caller's open connection if given, otherwise the shared pool."""
+    if isinstance(pool, Connection):
+        return pool
+    return db
+
+
 async def create_trade(
     pool: Optional[Pool],
     from_user: int,
@@ -1378,7 +2233,7 @@ async def create_trade(
 
 
 async def get_trade(
-    pool: Optional[Pool],
+    pool: Union[Pool, Connection, None],
     trade_id: int
 ) -> Optional[Record]:
     if not db.is_connected:
@@ -1407,7 +2262,7 @@ async def get_trade(
             LEFT JOIN cards rc ON t.requested_card_id = rc.card_id
             WHERE t.id = $1
         """
-        return await db.fetchrow(query, trade_id)
+        return await _runner(pool).fetchrow(query, trade_id)
     except Exception as e:
         error_logger.error(f"Error getting trade: {e}", exc_info=True)
         return None
@@ -1489,7 +2344,7 @@ async def count_pending_trades(
 
 
 async def update_trade_status(
-    pool: Optional[Pool],
+    pool: Union[Pool, Connection, None],
     trade_id: int,
     status: str
 ) -> bool:
@@ -1507,15 +2362,65 @@ async def update_trade_status(
             WHERE id = $1
             RETURNING id
         """
-        result = await db.fetchval(query, trade_id, status)
+        result = await _runner(pool).fetchval(query, trade_id, status)
         return result is not None
     except Exception as e:
         error_logger.error(f"Error updating trade status: {e}", exc_info=True)
         return False
 
 
-async def transfer_card_between_users(
+async def expire_stale_trades(
     pool: Optional[Pool],
+    max_age_hours: int = 24
+) -> int:
+    """Cancel pending trades older than max_age_hours in a single round trip."""
+    if not db.is_connected:
+        return 0
+
+    if not isinstance(max_age_hours, int) or max_age_hours <= 0:
+        raise ValueError("max_age_hours must be a positive integer")
+
+    try:
+        query = """
+            UPDATE trades
+            SET status = 'cancelled', updated_at = NOW()
+            WHERE status = 'pending'
+              AND created_at < NOW() - ($1 * INTERVAL '1 hour')
+        """
+        status = await db.execute(query, max_age_hours)
+        return int(status.split()[-1])
+    except Exception as e:
+        error_logger.error(f"Error expiring stale trades: {e}", exc_info=True)
+        return 0
+
+
+async def run_trade_expirer(interval: int = 3600, max_age_hours: int = 24) -> None:
+    """Periodically cancel stale pending trades until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        await expire_stale_trades(None, max_age_hours)
+
+
+async def _transfer_on_conn(
+    conn: Connection,
+    from_user: int,
+    to_user: int,
+    card_id: int,
+    quantity: int = 1
+) -> tuple[bool, str]:
+    """Move cards between users with one statement on `conn`."""
+    moved = await conn.fetchval(
+        HOT_STATEMENTS["transfer_cards"], from_user, to_user, card_id, quantity
+    )
+    if moved is None:
+        sender_qty = await conn.fetchval(HOT_STATEMENTS["user_card_qty"], from_user, card_id)
+        return False, f"Insufficient cards (have: {sender_qty or 0}, need: {quantity})"
+
+    return True, "Transfer successful"
+
+
+async def transfer_card_between_users(
+    pool: Union[Pool, Connection, None],
     from_user: int,
     to_user: int,
     card_id: int,
@@ -1531,44 +2436,23 @@ async def transfer_card_between_users(
         return False, "Invalid quantity"
 
     try:
-        async with db.pool.acquire() as conn:
-            async with conn.transaction():
-                sender_qty = await conn.fetchval(
-                    """
-                    SELECT quantity FROM collections
-                    WHERE user_id = $1 AND card_id = $2
-                    FOR UPDATE
-                    """,
-                    from_user, card_id
+        if isinstance(pool, Connection):
+            # Caller's transaction: run as a savepoint on their connection
+            async with pool.transaction():
+                success, msg = await _transfer_on_conn(
+                    pool, from_user, to_user, card_id, quantity
                 )
-
-                if sender_qty is None or sender_qty < quantity:
-                    return False, f"Insufficient cards (have: {sender_qty or 0}, need: {quantity})"
-
-                new_sender_qty = sender_qty - quantity
-
-                if new_sender_qty <= 0:
-                    await conn.execute(
-                        "DELETE FROM collections WHERE user_id = $1 AND card_id = $2",
-                        from_user, card_id
-                    )
-                else:
-                    await conn.execute(
-                        "UPDATE collections SET quantity = $3 WHERE user_id = $1 AND card_id = $2",
-                        from_user, card_id, new_sender_qty
-                    )
-
-                await conn.execute(
-                    """
-                    INSERT INTO collections (user_id, card_id, quantity, caught_at)
-                    VALUES ($1, $2, $3, NOW())
-                    ON CONFLICT (user_id, card_id) DO UPDATE
-                    SET quantity = collections.quantity + $3
-                    """,
-                    to_user, card_id, quantity
+        else:
+            # A single statement is atomic on its own; no BEGIN/COMMIT round trips
+            async with db.pool.acquire() as conn:
+                success, msg = await _transfer_on_conn(
+                    conn, from_user, to_user, card_id, quantity
                 )
 
-                return True, "Transfer successful"
+        if success:
+            invalidate_collection_count(from_user)
+            invalidate_collection_count(to_user)
+        return success, msg
 
     except Exception as e:
         error_logger.error(f"Error transferring card: {e}", exc_info=True)
@@ -1584,61 +2468,64 @@ async def execute_trade(
         return False, "Database not connected"
 
     try:
-        trade = await get_trade(None, trade_id)
+        async with db.pool.acquire() as conn:
+            async with conn.transaction():
+                trade = await conn.fetchrow(
+                    """
+                    SELECT from_user, to_user, offered_card_id, requested_card_id, status
+                    FROM trades WHERE id = $1
+                    FOR UPDATE
+                    """,
+                    trade_id
+                )
 
-        if not trade:
-            return False, "Trade not found"
+                if not trade:
+                    return False, "Trade not found"
 
-        if trade["status"] != "pending":
-            return False, f"Trade is no longer pending (status: {trade['status']})"
+                if trade["status"] != "pending":
+                    return False, f"Trade is no longer pending (status: {trade['status']})"
 
-        if trade["to_user"] != accepting_user_id:
-            return False, "Only the recipient can accept this trade"
+                if trade["to_user"] != accepting_user_id:
+                    return False, "Only the recipient can accept this trade"
 
-        from_user = trade["from_user"]
-        to_user = trade["to_user"]
-        offered_card_id = trade["offered_card_id"]
-        requested_card_id = trade.get("requested_card_id")
+                from_user = trade["from_user"]
+                to_user = trade["to_user"]
+                offered_card_id = trade["offered_card_id"]
+                requested_card_id = trade["requested_card_id"]
 
-        async with db.pool.acquire() as conn:
-            async with conn.transaction():
-                from_qty = await conn.fetchval(
-                    "SELECT quantity FROM collections WHERE user_id = $1 AND card_id = $2 FOR UPDATE",
-                    from_user, offered_card_id
+                locked = await conn.fetch(
+                    HOT_STATEMENTS["lock_trade_pair"],
+                    from_user, offered_card_id, to_user, requested_card_id
                 )
+                quantities = {(r["user_id"], r["card_id"]): r["quantity"] for r in locked}
 
+                from_qty = quantities.get((from_user, offered_card_id))
                 if not from_qty or from_qty < 1:
-                    await update_trade_status(None, trade_id, "failed")
+                    await update_trade_status(conn, trade_id, "failed")
                     return False, "Offerer no longer has the offered card"
 
-                if requested_card_id:
-                    to_qty = await conn.fetchval(
-                        "SELECT quantity FROM collections WHERE user_id = $1 AND card_id = $2 FOR UPDATE",
-                        to_user, requested_card_id
-                    )
+                # (sender, receiver, card_id) for each leg of the swap
+                legs = [(from_user, to_user, offered_card_id)]
 
+                if requested_card_id:
+                    to_qty = quantities.get((to_user, requested_card_id))
                     if not to_qty or to_qty < 1:
-                        await update_trade_status(None, trade_id, "failed")
+                        await update_trade_status(conn, trade_id, "failed")
                         return False, "Recipient no longer has the requested card"
 
-                success1, msg1 = await transfer_card_between_users(
-                    None, from_user, to_user, offered_card_id, 1
-                )
-
-                if not success1:
-                    raise Exception(f"Failed to transfer offered card: {msg1}")
+                    legs.append((to_user, from_user, requested_card_id))
 
-                if requested_card_id:
-                    success2, msg2 = await transfer_card_between_users(
-                        None, to_user, from_user, requested_card_id, 1
+                # One statement per leg; the rows are locked and checked above
+                for sender, receiver, card_id in legs:
+                    await conn.fetchval(
+                        HOT_STATEMENTS["transfer_cards"], sender, receiver, card_id, 1
                     )
 
-                    if not success2:
-                        raise Exception(f"Failed to transfer requested card: {msg2}")
-
-                await update_trade_status(None, trade_id, "completed")
+                await update_trade_status(conn, trade_id, "completed")
 
-                return True, "Trade completed successfully!"
+        invalidate_collection_count(from_user)
+        invalidate_collection_count(to_user)
+        return True, "Trade completed successfully!"
 
     except Exception as e:
         error_logger.error(f"Error executing trade: {e}", exc_info=True)
@@ -1667,8 +2554,8 @@ async def get_unique_characters(
                 FROM cards
                 WHERE is_active = TRUE
                   AND (
-                    LOWER(character_name) LIKE LOWER($1)
-                    OR LOWER(anime) LIKE LOWER($1)
+                    character_name ILIKE $1
+                    OR anime ILIKE $1
                   )
                 GROUP BY character_name, anime
                 ORDER BY character_name ASC
@@ -1701,14 +2588,16 @@ async def get_cards_by_character(
         return []
 
     try:
-        query = """
-            SELECT * FROM cards
+        query = f"""
+            SELECT {CARD_COLUMNS} FROM cards
             WHERE is_active = TRUE
-              AND LOWER(character_name) = LOWER($1)
+              AND character_name ILIKE $1
             ORDER BY rarity DESC
             LIMIT $2
         """
-        return await db.fetch(query, character_name, limit)
+        # Escaped ILIKE is a case-insensitive equality the trigram index can serve
+        pattern = character_name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return await db.fetch(query, pattern, limit)
     except Exception as e:
         error_logger.error(f"Error getting cards by character: {e}")
         return []
@@ -1718,6 +2607,16 @@ async def get_cards_by_character(
 # 👑 Role Management
 # ============================================================
 
+# Roles checked on every privileged command, keyed by user_id -> (role, expires_at)
+ROLE_CACHE_TTL = 60
+_role_cache: dict[int, tuple[Optional[str], float]] = {}
+
+
+def invalidate_user_role(user_id: int) -> None:
+    """Drop a user's cached role after it is granted or revoked."""
+    _role_cache.pop(user_id, None)
+
+
 async def add_role(
     pool: Optional[Pool],
     user_id: int,
@@ -1741,6 +2640,7 @@ async def add_role(
             """,
             user_id, role.lower()
         )
+        invalidate_user_role(user_id)
         return True
     except Exception as e:
         error_logger.error(f"Error adding role: {e}")
@@ -1762,6 +2662,7 @@ async def remove_role(
             """,
             user_id
         )
+        invalidate_user_role(user_id)
         return True
     except Exception as e:
         error_logger.error(f"Error removing role: {e}")
@@ -1775,12 +2676,14 @@ async def get_user_role(
     if not db.is_connected:
         return None
     
+    cached = _role_cache.get(user_id)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+    
     try:
-        result = await db.fetchval(
-            "SELECT role FROM users WHERE user_id = $1",
-            user_id
-        )
-        return result
+        role = await db.fetchval_prepared("user_role", user_id)
+        _role_cache[user_id] = (role, time.monotonic() + ROLE_CACHE_TTL)
+        return role
     except Exception as e:
         error_logger.error(f"Error getting role: {e}")
         return None
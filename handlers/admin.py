@@ -30,13 +30,20 @@ from db import (
     get_global_stats,
     get_card_count,
     get_all_groups,
+    get_active_user_ids,
     get_rarity_distribution,
+    get_table_counts,
     health_check,
     get_card_by_id,
+    get_cards_by_ids,
     get_user_by_id,
     ensure_user,
     add_to_collection,
+    give_cards_to_users,
     update_user_stats,
+    clear_user_collection,
+    invalidate_query_cache,
+    invalidate_card_pool,
 )
 from utils.logger import app_logger, error_logger, log_command
 from utils.rarity import RARITY_TABLE, get_rarity_emoji, rarity_to_text
@@ -194,8 +201,10 @@ async def admin_callback_handler(update: Update, context: ContextTypes.DEFAULT_T
 
     # Cards Info
     elif data == "adm:cards":
-        total_cards = await get_card_count(None)
-        distribution = await get_rarity_distribution(None)
+        total_cards, distribution = await asyncio.gather(
+            get_card_count(None),
+            get_rarity_distribution(None),
+        )
 
         dist_lines = []
         for row in distribution:
@@ -391,13 +400,13 @@ async def broadcast_execute(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return ConversationHandler.END
 
     try:
-        users = await db.fetch("SELECT user_id FROM users WHERE is_banned = FALSE")
+        user_ids = await get_active_user_ids(None)
     except Exception as e:
         error_logger.error(f"Broadcast user fetch failed: {e}")
         await update.message.reply_text("❌ Failed to get users.")
         return ConversationHandler.END
 
-    total = len(users)
+    total = len(user_ids)
     if total == 0:
         await update.message.reply_text("❌ No users to broadcast to.")
         return ConversationHandler.END
@@ -411,8 +420,7 @@ async def broadcast_execute(update: Update, context: ContextTypes.DEFAULT_TYPE)
     blocked = 0
     failed = 0
 
-    for row in users:
-        uid = row["user_id"]
+    for uid in user_ids:
         try:
             await context.bot.send_message(
                 chat_id=uid,
@@ -545,8 +553,17 @@ async def delete_card_callback(update: Update, context: ContextTypes.DEFAULT_TYP
         character = card["character_name"]
 
         try:
-            await db.execute("DELETE FROM collections WHERE card_id = $1", card_id)
-            await db.execute("DELETE FROM cards WHERE card_id = $1", card_id)
+            # One atomic statement; also covers databases where the
+            # collections -> cards cascade constraint could not be added
+            await db.execute(
+                """
+                WITH owned AS (DELETE FROM collections WHERE card_id = $1)
+                DELETE FROM cards WHERE card_id = $1
+                """,
+                card_id
+            )
+            invalidate_query_cache()
+            invalidate_card_pool()
 
             await query.edit_message_text(
                 f"✅ *Card Deleted*\n\n"
@@ -568,6 +585,11 @@ async def delete_card_callback(update: Update, context: ContextTypes.DEFAULT_TYP
 EDIT_SELECT_FIELD = 0
 EDIT_NEW_VALUE = 1
 _edit_sessions: Dict[int, Dict[str, Any]] = {}
+# One fixed statement per editable text field, so each keeps its cached plan
+_CARD_FIELD_UPDATES = {
+    field: f"UPDATE cards SET {field} = $1 WHERE card_id = $2"
+    for field in ("character_name", "anime")
+}
 
 
 async def edit_card_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -710,6 +732,8 @@ async def edit_field_callback(update: Update, context: ContextTypes.DEFAULT_TYPE
 
         try:
             await db.execute("UPDATE cards SET rarity = $1 WHERE card_id = $2", new_rarity, card_id)
+            invalidate_query_cache()
+            invalidate_card_pool()
             emoji = RARITY_EMOJIS.get(new_rarity, "❓")
             name = RARITY_NAMES.get(new_rarity, "Unknown")
 
@@ -752,7 +776,9 @@ async def edit_new_value_handler(update: Update, context: ContextTypes.DEFAULT_T
         return EDIT_NEW_VALUE
 
     try:
-        await db.execute(f"UPDATE cards SET {field} = $1 WHERE card_id = $2", new_value, card_id)
+        await db.execute(_CARD_FIELD_UPDATES[field], new_value, card_id)
+        invalidate_query_cache()
+        invalidate_card_pool()
         field_name = "Name" if field == "character_name" else "Anime"
 
         await update.message.reply_text(
@@ -908,7 +934,7 @@ async def user_management_callback(update: Update, context: ContextTypes.DEFAULT
 
     try:
         if action == "rc":  # Reset cards
-            await db.execute("DELETE FROM collections WHERE user_id = $1", target_id)
+            await clear_user_collection(None, target_id)
             await query.edit_message_text(f"✅ Cards reset for `{target_id}`", parse_mode=ParseMode.MARKDOWN)
             app_logger.info(f"🔄 User {target_id} cards reset by {user.id}")
 
@@ -957,35 +983,47 @@ async def give_card_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text(
             "🎁 *Give Card*\n\n"
             "Reply to user with:\n"
-            "`/gcard <card_id>`",
+            "`/gcard <card_id> [card_id ...]`",
             parse_mode=ParseMode.MARKDOWN
         )
         return
 
     try:
-        card_id = int(context.args[0])
+        card_ids = [int(arg) for arg in context.args]
     except ValueError:
         await update.message.reply_text("❌ Invalid card ID.")
         return
 
-    card = await get_card_by_id(None, card_id)
-    if not card:
-        await update.message.reply_text(f"❌ Card `#{card_id}` not found.", parse_mode=ParseMode.MARKDOWN)
+    cards = {card["card_id"]: card for card in await get_cards_by_ids(None, card_ids)}
+    missing = [card_id for card_id in card_ids if card_id not in cards]
+    if missing:
+        missing_text = ", ".join(f"`#{card_id}`" for card_id in dict.fromkeys(missing))
+        await update.message.reply_text(f"❌ Card {missing_text} not found.", parse_mode=ParseMode.MARKDOWN)
         return
 
     await ensure_user(None, target_id, None, target_name, None)
 
     try:
-        await add_to_collection(None, target_id, card_id, update.effective_chat.id)
-        emoji = RARITY_EMOJIS.get(card["rarity"], "❓")
+        if len(card_ids) == 1:
+            await add_to_collection(None, target_id, card_ids[0], update.effective_chat.id)
+        else:
+            await give_cards_to_users(
+                None, [(target_id, card_id) for card_id in card_ids], update.effective_chat.id
+            )
+
+        card_lines = []
+        for card_id in card_ids:
+            card = cards[card_id]
+            emoji = RARITY_EMOJIS.get(card["rarity"], "❓")
+            card_lines.append(f"{emoji} {card['character_name']}")
 
         await update.message.reply_text(
             f"🎁 *Card Given!*\n\n"
             f"👤 [{target_name}](tg://user?id={target_id})\n"
-            f"{emoji} {card['character_name']}",
+            + "\n".join(card_lines),
             parse_mode=ParseMode.MARKDOWN
         )
-        app_logger.info(f"🎁 Card {card_id} → {target_id} by {user.id}")
+        app_logger.info(f"🎁 Cards {card_ids} → {target_id} by {user.id}")
 
     except Exception as e:
         error_logger.error(f"Give card failed: {e}")
@@ -1025,8 +1063,8 @@ async def give_coins_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await ensure_user(None, target_id, None, target_name, None)
 
     try:
-        await update_user_stats(None, target_id, coins_delta=amount)
-        new_balance = await db.fetchval("SELECT coins FROM users WHERE user_id = $1", target_id)
+        updated = await update_user_stats(None, target_id, coins_delta=amount)
+        new_balance = updated["coins"] if updated else None
 
         action = "added" if amount >= 0 else "removed"
 
@@ -1054,7 +1092,10 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         await update.message.reply_text("🚫 Admin only.")
         return
 
-    stats = await get_global_stats(None)
+    stats, table_counts = await asyncio.gather(
+        get_global_stats(None),
+        get_table_counts(None, ("collections", "trades")),
+    )
 
     await update.message.reply_text(
         f"📊 *Quick Stats*\n\n"
@@ -1062,6 +1103,8 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         f"🎴 Cards: {format_number(stats.get('total_cards', 0))}\n"
         f"🎯 Catches: {format_number(stats.get('total_catches', 0))}\n"
         f"💬 Groups: {format_number(stats.get('active_groups', 0))}\n"
+        f"📦 Collection rows: {format_number(table_counts.get('collections', 0))}\n"
+        f"🔄 Trades: {format_number(table_counts.get('trades', 0))}\n"
         f"⏱️ Uptime: {get_uptime()}",
         parse_mode=ParseMode.MARKDOWN
     )
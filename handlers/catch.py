@@ -31,9 +31,7 @@ from db import (
     ensure_user,
     get_random_card,
     get_card_by_id,
-    add_to_collection,
-    update_user_stats,
-    increment_card_caught,
+    apply_catch,
     ensure_group,
     get_card_count,
     get_all_groups,
@@ -699,9 +697,11 @@ async def execute_battle(update: Update, context: ContextTypes.DEFAULT_TYPE, bat
         
         # Add to collection
         try:
-            await add_to_collection(None, user.id, battle.card_id, battle.chat_id)
-            await increment_card_caught(None, battle.card_id)
-            await update_user_stats(None, user.id, coins_delta=coin_reward, xp_delta=xp_reward, catches_delta=1)
+            await apply_catch(
+                None, user.id, battle.card_id, battle.chat_id,
+                coins_delta=coin_reward, xp_delta=xp_reward,
+                username=user.username, first_name=user.first_name
+            )
             log_card_catch(user.id, character, rarity_name)
         except Exception as e:
             error_logger.error(f"Failed to add card: {e}")
@@ -7,8 +7,9 @@
 import asyncio
 import random
 import re
+import time
 from datetime import datetime
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Mapping, Tuple
 from difflib import SequenceMatcher
 
 from telegram import Update
@@ -24,7 +25,7 @@ except ImportError:
     REACTIONS_AVAILABLE = False
 
 from config import Config
-from db import db
+from db import db, apply_catch, get_random_card
 from utils.logger import app_logger, error_logger, log_command
 from utils.rarity import (
     get_random_rarity,
@@ -49,6 +50,7 @@ DEFAULT_DROP_THRESHOLD = 90
 MIN_DROP_THRESHOLD = 10
 MAX_DROP_THRESHOLD = 500
 DROP_TIMEOUT = 300  # 5 minutes
+LAST_SEEN_INTERVAL = 3600  # seconds between groups.last_seen writes
 
 
 # ============================================================
@@ -58,6 +60,10 @@ DROP_TIMEOUT = 300  # 5 minutes
 active_drops: Dict[int, Dict[str, Any]] = {}
 message_counters: Dict[int, int] = {}
 drop_locks: Dict[int, bool] = {}
+# Group name last written per group, so repeat messages skip the upsert
+known_groups: Dict[int, Optional[str]] = {}
+# When each group's last_seen was last written (monotonic seconds)
+group_seen_at: Dict[int, float] = {}
 
 
 # ============================================================
@@ -67,13 +73,7 @@ drop_locks: Dict[int, bool] = {}
 async def get_group_drop_settings(group_id: int) -> Dict[str, Any]:
     """Get group drop settings."""
     try:
-        row = await db.fetchrow(
-            """
-            SELECT drop_threshold, drop_enabled, message_count, last_drop_at 
-            FROM groups WHERE group_id = $1
-            """,
-            group_id
-        )
+        row = await db.fetchrow_prepared("group_drop_settings", group_id)
         if row:
             return {
                 "threshold": row.get("drop_threshold") or DEFAULT_DROP_THRESHOLD,
@@ -112,16 +112,7 @@ async def set_group_drop_threshold(group_id: int, threshold: int) -> bool:
 async def increment_message_count(group_id: int) -> int:
     """Increment message count for group."""
     try:
-        result = await db.fetchval(
-            """
-            INSERT INTO groups (group_id, message_count, drop_enabled)
-            VALUES ($1, 1, TRUE)
-            ON CONFLICT (group_id) DO UPDATE 
-            SET message_count = COALESCE(groups.message_count, 0) + 1
-            RETURNING message_count
-            """,
-            group_id
-        )
+        result = await db.fetchval_prepared("increment_message_count", group_id)
         message_counters[group_id] = result or 1
         return result or 1
     except Exception as e:
@@ -146,43 +137,26 @@ async def reset_message_count(group_id: int) -> bool:
 
 async def ensure_group_exists(group_id: int, group_name: Optional[str] = None) -> bool:
     """Ensure group exists in database."""
+    if group_id in known_groups and known_groups[group_id] == group_name:
+        return True
+    
     try:
-        await db.execute(
-            """
-            INSERT INTO groups (group_id, group_name, drop_enabled, message_count)
-            VALUES ($1, $2, TRUE, 0)
-            ON CONFLICT (group_id) DO UPDATE 
-            SET group_name = COALESCE($2, groups.group_name)
-            """,
-            group_id, group_name
-        )
+        await db.execute_prepared("ensure_group", group_id, group_name)
+        known_groups[group_id] = group_name
         return True
     except Exception as e:
         error_logger.error(f"Failed to ensure group: {e}")
         return False
 
 
-async def get_random_card_for_drop() -> Optional[Dict[str, Any]]:
+async def get_random_card_for_drop() -> Optional[Mapping[str, Any]]:
     """Get random card for drop."""
     try:
         rarity = get_random_rarity()
-        card = await db.fetchrow(
-            """
-            SELECT card_id, character_name, anime, rarity, photo_file_id
-            FROM cards WHERE rarity = $1 AND is_active = TRUE
-            ORDER BY RANDOM() LIMIT 1
-            """,
-            rarity
-        )
+        card = await get_random_card(None, rarity)
         if not card:
-            card = await db.fetchrow(
-                """
-                SELECT card_id, character_name, anime, rarity, photo_file_id
-                FROM cards WHERE is_active = TRUE
-                ORDER BY RANDOM() LIMIT 1
-                """
-            )
-        return dict(card) if card else None
+            card = await get_random_card(None)
+        return card
     except Exception as e:
         error_logger.error(f"Failed to get card: {e}")
         return None
@@ -193,52 +167,20 @@ async def record_catch(
     card_id: int,
     group_id: int,
     username: Optional[str] = None,
-    first_name: Optional[str] = None
-) -> bool:
-    """Record a catch in database."""
+    first_name: Optional[str] = None,
+    coins: int = 0
+) -> Optional[Mapping[str, Any]]:
+    """Record a catch in database; returns the updated collection row."""
     try:
-        # Ensure user exists
-        await db.execute(
-            """
-            INSERT INTO users (user_id, username, first_name)
-            VALUES ($1, $2, $3)
-            ON CONFLICT (user_id) DO UPDATE SET
-                username = COALESCE($2, users.username),
-                first_name = COALESCE($3, users.first_name)
-            """,
-            user_id, username, first_name
-        )
-        
-        # Add to collection
-        await db.execute(
-            """
-            INSERT INTO collections (user_id, card_id, caught_at, caught_in_group, quantity)
-            VALUES ($1, $2, NOW(), $3, 1)
-            ON CONFLICT (user_id, card_id) DO UPDATE SET
-                quantity = collections.quantity + 1,
-                caught_at = NOW()
-            """,
-            user_id, card_id, group_id
-        )
-        
-        # Update stats
-        await db.execute(
-            "UPDATE users SET total_catches = COALESCE(total_catches, 0) + 1 WHERE user_id = $1",
-            user_id
+        # User, rewards, collection and catch counters in one atomic statement
+        row = await apply_catch(
+            None, user_id, card_id, group_id,
+            coins_delta=coins, username=username, first_name=first_name
         )
-        await db.execute(
-            "UPDATE groups SET total_catches = COALESCE(total_catches, 0) + 1 WHERE group_id = $1",
-            group_id
-        )
-        await db.execute(
-            "UPDATE cards SET total_caught = COALESCE(total_caught, 0) + 1 WHERE card_id = $1",
-            card_id
-        )
-        
-        return True
+        return row
     except Exception as e:
         error_logger.error(f"Failed to record catch: {e}")
-        return False
+        return None
 
 
 # ============================================================
@@ -639,29 +581,15 @@ async def lulucatch_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     coin_reward = get_coin_reward(rarity)
     xp_reward = get_xp_reward(rarity)
     
-    if not await record_catch(user.id, card_id, chat.id, user.username, user.first_name):
+    caught = await record_catch(
+        user.id, card_id, chat.id, user.username, user.first_name, coins=coin_reward
+    )
+    if not caught:
         await message.reply_text("❌ Error saving. Try again.", parse_mode=ParseMode.MARKDOWN)
         drop["caught_by"] = None
         return
     
-    # Add coins
-    try:
-        await db.execute(
-            "UPDATE users SET coins = COALESCE(coins, 0) + $2 WHERE user_id = $1",
-            user.id, coin_reward
-        )
-    except Exception:
-        pass
-    
-    # Check if new card
-    try:
-        count = await db.fetchval(
-            "SELECT quantity FROM collections WHERE user_id = $1 AND card_id = $2",
-            user.id, card_id
-        )
-        is_new = (count == 1)
-    except Exception:
-        is_new = True
+    is_new = caught["quantity"] == 1
     
     # Send success message
     await message.reply_text(
@@ -838,6 +766,25 @@ async def message_counter_handler(update: Update, context: ContextTypes.DEFAULT_
         error_logger.error(f"Message counter error: {e}")
 
 
+async def group_activity_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Keep groups.last_seen current for every group message, commands included."""
+    chat = update.effective_chat
+    
+    if not chat or chat.type not in ["group", "supergroup"]:
+        return
+    
+    now = time.monotonic()
+    if now - group_seen_at.get(chat.id, float("-inf")) < LAST_SEEN_INTERVAL:
+        return
+    group_seen_at[chat.id] = now
+    
+    try:
+        await db.execute_prepared("touch_group", chat.id)
+    except Exception as e:
+        group_seen_at.pop(chat.id, None)
+        error_logger.error(f"Group activity update failed: {e}")
+
+
 # ============================================================
 # 🔧 Handler Exports
 # ============================================================
@@ -854,6 +801,9 @@ message_counter = MessageHandler(
     message_counter_handler
 )
 
+# Runs in its own handler group so commands and drops don't hide activity
+group_activity = MessageHandler(filters.ChatType.GROUPS, group_activity_handler)
+
 # Export list
 drop_handlers = [
     setdrop_handler,
@@ -11,7 +11,7 @@ from telegram import Bot
 from telegram.error import TelegramError, Forbidden, BadRequest
 
 from config import Config
-from db import db, get_all_groups
+from db import db, get_active_group_ids
 from utils.logger import app_logger, error_logger
 from utils.rarity import rarity_to_text
 
@@ -61,19 +61,17 @@ async def notify_groups_new_card(
     )
     
     # Get all active groups
-    groups = await get_all_groups(None, active_only=True)
+    group_ids = await get_active_group_ids(None)
     
-    if not groups:
+    if not group_ids:
         return {"success": 0, "failed": 0, "total": 0}
     
     success_count = 0
     fail_count = 0
     
-    app_logger.info(f"📢 Notifying {len(groups)} groups about card #{card_id}")
+    app_logger.info(f"📢 Notifying {len(group_ids)} groups about card #{card_id}")
     
-    for group in groups:
-        group_id = group["group_id"]
-        
+    for group_id in group_ids:
         try:
             if photo_file_id:
                 await bot.send_photo(
@@ -125,7 +123,7 @@ async def notify_groups_new_card(
     return {
         "success": success_count,
         "failed": fail_count,
-        "total": len(groups)
+        "total": len(group_ids)
     }
 
 
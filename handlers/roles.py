@@ -14,7 +14,13 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import CommandHandler, CallbackQueryHandler, ContextTypes
 
 from config import Config
-from db import db, ensure_user, get_user_by_id
+from db import (
+    db,
+    ensure_user,
+    get_user_by_id,
+    get_user_role as db_get_user_role,
+    invalidate_user_role,
+)
 from utils.logger import app_logger, error_logger
 
 
@@ -23,14 +29,8 @@ from utils.logger import app_logger, error_logger
 # ============================================================
 
 async def get_user_role(user_id: int) -> str | None:
-    """Get user's role from database."""
-    if not db.is_connected:
-        return None
-    try:
-        return await db.fetchval("SELECT role FROM users WHERE user_id = $1", user_id)
-    except Exception as e:
-        error_logger.error(f"Error getting role: {e}")
-        return None
+    """Get user's role from database (cached briefly in db)."""
+    return await db_get_user_role(None, user_id)
 
 
 async def is_owner(user_id: int) -> bool:
@@ -105,6 +105,7 @@ async def set_user_role(user_id: int, role: str | None) -> bool:
             """,
             user_id, role
         )
+        invalidate_user_role(user_id)
         return True
     except Exception as e:
         error_logger.error(f"Error setting role: {e}")
@@ -24,7 +24,13 @@ from telegram.constants import ChatType
 from telegram.error import TelegramError, BadRequest
 
 from config import Config
-from db import db, ensure_user, get_card_count
+from db import (
+    db,
+    ensure_user,
+    get_card_count,
+    invalidate_query_cache,
+    invalidate_card_pool,
+)
 from utils.logger import app_logger, error_logger, log_command
 from utils.rarity import get_random_rarity, rarity_to_text
 
@@ -54,6 +60,9 @@ EDIT_MENU = 7
 _upload_cooldowns: Dict[int, datetime] = {}
 UPLOAD_COOLDOWN_SECONDS = 5
 
+# The constraint is only ever removed, so check for it once per process
+_unique_constraint_removed = False
+
 
 def check_upload_cooldown(user_id: int) -> tuple[bool, int]:
     """Check if user is on upload cooldown."""
@@ -119,12 +128,10 @@ async def get_existing_anime_list() -> List[str]:
     
     try:
         query = """
-            SELECT DISTINCT anime FROM cards 
-            WHERE is_active = TRUE 
-            ORDER BY anime ASC
+            SELECT COALESCE(array_agg(DISTINCT anime ORDER BY anime), '{}')
+            FROM cards WHERE is_active = TRUE
         """
-        rows = await db.fetch(query)
-        return [row['anime'] for row in rows]
+        return await db.fetchval(query)
     except Exception as e:
         error_logger.error(f"Error fetching anime list: {e}")
         return []
@@ -137,12 +144,10 @@ async def get_characters_for_anime(anime: str) -> List[str]:
     
     try:
         query = """
-            SELECT DISTINCT character_name FROM cards 
-            WHERE anime = $1 AND is_active = TRUE 
-            ORDER BY character_name ASC
+            SELECT COALESCE(array_agg(DISTINCT character_name ORDER BY character_name), '{}')
+            FROM cards WHERE anime = $1 AND is_active = TRUE
         """
-        rows = await db.fetch(query, anime)
-        return [row['character_name'] for row in rows]
+        return await db.fetchval(query, anime)
     except Exception as e:
         error_logger.error(f"Error fetching characters: {e}")
         return []
@@ -193,48 +198,26 @@ async def insert_card_direct(
         raise ValueError(f"Invalid rarity: {rarity}. Must be 1-11.")
     
     try:
-        check_column = """
-            SELECT column_name FROM information_schema.columns 
-            WHERE table_name = 'cards' AND column_name = 'photo_unique_id'
+        query = """
+            INSERT INTO cards (
+                anime, character_name, rarity, photo_file_id,
+                photo_unique_id, uploader_id, description, tags,
+                created_at, is_active, total_caught
+            )
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW(), TRUE, 0)
+            RETURNING *
         """
-        column_exists = await db.fetchrow(check_column)
+        tags = [anime.lower(), character.lower().split()[0] if character else ""]
+        description = f"Uploaded by user {uploader_id}"
         
-        if column_exists:
-            query = """
-                INSERT INTO cards (
-                    anime, character_name, rarity, photo_file_id,
-                    photo_unique_id, uploader_id, description, tags,
-                    created_at, is_active, total_caught
-                )
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW(), TRUE, 0)
-                RETURNING *
-            """
-            tags = [anime.lower(), character.lower().split()[0] if character else ""]
-            description = f"Uploaded by user {uploader_id}"
-            
-            result = await db.fetchrow(
-                query, anime, character, rarity, photo_file_id,
-                photo_unique_id, uploader_id, description, tags
-            )
-        else:
-            query = """
-                INSERT INTO cards (
-                    anime, character_name, rarity, photo_file_id,
-                    uploader_id, description, tags,
-                    created_at, is_active, total_caught
-                )
-                VALUES ($1, $2, $3, $4, $5, $6, $7, NOW(), TRUE, 0)
-                RETURNING *
-            """
-            tags = [anime.lower(), character.lower().split()[0] if character else ""]
-            description = f"Uploaded by user {uploader_id}"
-            
-            result = await db.fetchrow(
-                query, anime, character, rarity, photo_file_id,
-                uploader_id, description, tags
-            )
+        result = await db.fetchrow(
+            query, anime, character, rarity, photo_file_id,
+            photo_unique_id, uploader_id, description, tags
+        )
         
         if result:
+            invalidate_query_cache()
+            invalidate_card_pool()
             app_logger.info(
                 f"✅ Card inserted: ID={result['card_id']}, "
                 f"{character} ({anime}), rarity={rarity}"
@@ -271,6 +254,11 @@ async def insert_card_direct(
 
 async def ensure_no_unique_constraint() -> bool:
     """Remove the unique constraint on (anime, character_name) if it exists."""
+    global _unique_constraint_removed
+    
+    if _unique_constraint_removed:
+        return True
+    
     if not db.is_connected:
         return False
     
@@ -298,6 +286,7 @@ async def ensure_no_unique_constraint() -> bool:
         except Exception:
             pass
         
+        _unique_constraint_removed = True
         return True
         
     except Exception as e:
@@ -305,28 +294,6 @@ async def ensure_no_unique_constraint() -> bool:
         return False
 
 
-async def add_photo_unique_id_column() -> bool:
-    """Add photo_unique_id column if it doesn't exist."""
-    if not db.is_connected:
-        return False
-    
-    try:
-        await db.execute("""
-            ALTER TABLE cards 
-            ADD COLUMN IF NOT EXISTS photo_unique_id TEXT
-        """)
-        
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_cards_photo_unique_id 
-            ON cards(photo_unique_id)
-        """)
-        
-        return True
-    except Exception as e:
-        error_logger.error(f"Error adding photo_unique_id column: {e}")
-        return False
-
-
 # ============================================================
 # 🎴 Step 0: Upload Start
 # ============================================================
@@ -370,7 +337,6 @@ async def upload_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
 
     # Ensure database is ready
     await ensure_no_unique_constraint()
-    await add_photo_unique_id_column()
 
     # Ensure user exists in database
     await ensure_user(
@@ -21,7 +21,18 @@ from telegram.ext import (
 from telegram.constants import ParseMode
 
 from config import Config
-from db import db, init_db, get_global_stats, ensure_user, get_user_by_id
+from db import (
+    db,
+    init_db,
+    get_global_stats,
+    ensure_user,
+    get_user_by_id,
+    run_leaderboard_refresher,
+    run_trade_expirer,
+    run_pool_keepalive,
+    start_cache_invalidation_listener,
+    warm_card_catalog,
+)
 from utils.logger import (
     app_logger,
     error_logger,
@@ -81,6 +92,7 @@ from handlers.drop import (
     cleardrop_handler,
     dropstats_handler,
     message_counter,
+    group_activity,
 )
 
 # Try to import role handlers
@@ -150,6 +162,9 @@ def registration_required(func):
 # ============================================================
 
 bot_app: Optional[Application] = None
+leaderboard_task: Optional[asyncio.Task] = None
+trade_expiry_task: Optional[asyncio.Task] = None
+keepalive_task: Optional[asyncio.Task] = None
 
 
 async def setup_bot() -> Application:
@@ -521,6 +536,9 @@ async def setup_bot() -> Application:
     # Message counter (MUST BE LAST)
     application.add_handler(message_counter)
 
+    # Group activity runs before every other group so nothing can consume it
+    application.add_handler(group_activity, group=-1)
+
     # === Error Handler ===
     application.add_error_handler(error_handler)
 
@@ -558,7 +576,7 @@ async def setup_bot() -> Application:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """FastAPI lifespan manager."""
-    global bot_app
+    global bot_app, leaderboard_task, trade_expiry_task, keepalive_task
 
     # === Startup ===
     log_startup("Starting LuLuCatch Bot v1.0...")
@@ -576,6 +594,18 @@ async def lifespan(app: FastAPI):
     db_connected = await db.connect(max_retries=3, retry_delay=2)
     if db_connected:
         await init_db()
+        await start_cache_invalidation_listener()
+        await warm_card_catalog()
+        leaderboard_task = asyncio.create_task(
+            run_leaderboard_refresher(Config.LEADERBOARD_REFRESH_SECONDS)
+        )
+        trade_expiry_task = asyncio.create_task(
+            run_trade_expirer(max_age_hours=Config.TRADE_EXPIRY_HOURS)
+        )
+        if Config.DB_KEEPALIVE_SECONDS > 0:
+            keepalive_task = asyncio.create_task(
+                run_pool_keepalive(Config.DB_KEEPALIVE_SECONDS)
+            )
     else:
         app_logger.warning("⚠️ Starting without database")
 
@@ -618,6 +648,15 @@ async def lifespan(app: FastAPI):
     # === Shutdown ===
     log_shutdown("Shutting down...")
 
+    if leaderboard_task:
+        leaderboard_task.cancel()
+
+    if trade_expiry_task:
+        trade_expiry_task.cancel()
+
+    if keepalive_task:
+        keepalive_task.cancel()
+
     if bot_app:
         try:
             await bot_app.stop()
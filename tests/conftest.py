@@ -0,0 +1,73 @@
+# ============================================================
+# 📁 File: tests/conftest.py
+# 📍 Location: telegram_card_bot/tests/conftest.py
+# 📝 Description: Fixtures for the database integration tests
+# ============================================================
+
+"""
+Integration tests run against a real PostgreSQL server.
+
+Point TEST_DATABASE_URL at a disposable database: its public schema is
+dropped and recreated before every test. Without it the tests are skipped.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")
+
+# Config reads the environment on import, so set it before importing db.
+# A small pool makes repeated calls land on the same pooled connections.
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    os.environ["DATABASE_DIRECT_URL"] = ""
+    os.environ["DB_MIN_CONNECTIONS"] = "1"
+    os.environ["DB_MAX_CONNECTIONS"] = "2"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db as db_module  # noqa: E402
+from db import db, init_db, invalidate_card_pool, invalidate_query_cache  # noqa: E402
+
+
+def _reset_caches() -> None:
+    """Forget everything cached in-process about the previous test's data."""
+    invalidate_query_cache()
+    invalidate_card_pool()
+    db_module._owned_cards.clear()
+    db_module._collection_count_cache.clear()
+    db_module._role_cache.clear()
+
+
+@pytest.fixture(scope="session")
+def loop():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    loop = asyncio.new_event_loop()
+    assert loop.run_until_complete(db.connect(max_retries=1))
+    yield loop
+    loop.run_until_complete(db.disconnect())
+    loop.close()
+
+
+@pytest.fixture
+def run(loop):
+    """Run a coroutine on the session loop that owns the pool."""
+    return loop.run_until_complete
+
+
+@pytest.fixture
+def fresh_db(run):
+    """An empty public schema with init_db applied."""
+    async def reset() -> bool:
+        await db.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public")
+        # Pooled connections may hold statements planned against the old tables
+        await db.pool.expire_connections()
+        _reset_caches()
+        return await init_db(None)
+
+    assert run(reset())
@@ -0,0 +1,24 @@
+# ============================================================
+# 📁 File: tests/test_cards.py
+# 📍 Location: telegram_card_bot/tests/test_cards.py
+# 📝 Description: Card creation against a real database
+# ============================================================
+
+from db import add_card, get_card_by_id
+
+
+def test_add_card_inserts_once_per_character(fresh_db, run):
+    async def scenario():
+        card = await add_card(None, "Naruto", "Hinata", 5, "photo-1", 42, "Shy", ["ninja"])
+        assert card is not None
+        assert card["character_name"] == "Hinata"
+        assert card["tags"] == ["ninja"]
+
+        assert await add_card(None, "Naruto", "Hinata", 7, "photo-2", 42) is None
+
+        other = await add_card(None, "Naruto", "Sakura", 3, "photo-3", 42)
+        assert other is not None and other["card_id"] != card["card_id"]
+
+        assert (await get_card_by_id(None, card["card_id"]))["rarity"] == 5
+
+    run(scenario())
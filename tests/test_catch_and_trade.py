@@ -0,0 +1,86 @@
+# ============================================================
+# 📁 File: tests/test_catch_and_trade.py
+# 📍 Location: telegram_card_bot/tests/test_catch_and_trade.py
+# 📝 Description: Catches, transfers and trades against a real database
+# ============================================================
+
+from db import (
+    add_card,
+    apply_catch,
+    check_user_has_card,
+    create_trade,
+    ensure_group,
+    ensure_user,
+    execute_trade,
+    get_trade,
+    get_user_by_id,
+    get_user_card_quantity,
+    transfer_card_between_users,
+)
+
+
+def test_apply_catch_records_everything_in_one_statement(fresh_db, run):
+    async def scenario():
+        card = await add_card(None, "Naruto", "Hinata", 5, "photo-1", 42)
+        card_id = card["card_id"]
+        await ensure_group(None, -100, "Leaf Village")
+
+        first = await apply_catch(None, 1001, card_id, -100, 50, 10, "lulu", "Lulu")
+        assert first["quantity"] == 1
+        second = await apply_catch(None, 1001, card_id, -100, 50, 10)
+        assert second["quantity"] == 2
+
+        user = await get_user_by_id(None, 1001)
+        assert user["first_name"] == "Lulu"
+        assert user["total_catches"] == 2
+        assert user["coins"] == 100
+        assert user["xp"] == 20
+
+        assert await get_user_card_quantity(None, 1001, card_id) == 2
+        assert await check_user_has_card(None, 1001, card_id)
+
+    run(scenario())
+
+
+def test_transfer_refuses_missing_cards(fresh_db, run):
+    async def scenario():
+        card = await add_card(None, "Naruto", "Hinata", 5, "photo-1", 42)
+        card_id = card["card_id"]
+        await ensure_user(None, 2002, "mika", "Mika", None)
+        await apply_catch(None, 1001, card_id)
+
+        ok, msg = await transfer_card_between_users(None, 1001, 2002, card_id, 2)
+        assert not ok and "have: 1" in msg
+
+        ok, _ = await transfer_card_between_users(None, 1001, 2002, card_id, 1)
+        assert ok
+        assert await get_user_card_quantity(None, 1001, card_id) == 0
+        assert await get_user_card_quantity(None, 2002, card_id) == 1
+        assert not await check_user_has_card(None, 1001, card_id)
+
+    run(scenario())
+
+
+def test_execute_trade_swaps_both_cards(fresh_db, run):
+    async def scenario():
+        offered = (await add_card(None, "Naruto", "Hinata", 5, "photo-1", 42))["card_id"]
+        requested = (await add_card(None, "Bleach", "Rukia", 7, "photo-2", 42))["card_id"]
+        await apply_catch(None, 1001, offered)
+        await apply_catch(None, 2002, requested)
+
+        trade_id = await create_trade(None, 1001, 2002, offered, requested)
+        assert trade_id
+
+        ok, msg = await execute_trade(None, trade_id, 1001)
+        assert not ok and "recipient" in msg
+
+        ok, msg = await execute_trade(None, trade_id, 2002)
+        assert ok, msg
+        assert (await get_trade(None, trade_id))["status"] == "completed"
+
+        assert await get_user_card_quantity(None, 1001, requested) == 1
+        assert await get_user_card_quantity(None, 1001, offered) == 0
+        assert await get_user_card_quantity(None, 2002, offered) == 1
+        assert await get_user_card_quantity(None, 2002, requested) == 0
+
+    run(scenario())
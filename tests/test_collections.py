@@ -0,0 +1,32 @@
+# ============================================================
+# 📁 File: tests/test_collections.py
+# 📍 Location: telegram_card_bot/tests/test_collections.py
+# 📝 Description: Collection writes and the caches in front of them
+# ============================================================
+
+from db import (
+    add_card,
+    add_to_collection,
+    check_user_has_card,
+    clear_user_collection,
+    ensure_user,
+    get_collection_count,
+)
+
+
+def test_clear_user_collection_drops_cached_ownership(fresh_db, run):
+    async def scenario():
+        await ensure_user(None, 1001, "lulu", "Lulu", None)
+        card = await add_card(None, "Naruto", "Hinata", 5, "photo-1", 42)
+        await add_to_collection(None, 1001, card["card_id"])
+
+        # Warm the owned-card set and the count cache
+        assert await check_user_has_card(None, 1001, card["card_id"])
+        assert await get_collection_count(None, 1001) == 1
+
+        assert await clear_user_collection(None, 1001) == 1
+
+        assert not await check_user_has_card(None, 1001, card["card_id"])
+        assert await get_collection_count(None, 1001) == 0
+
+    run(scenario())
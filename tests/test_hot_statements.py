@@ -0,0 +1,34 @@
+# ============================================================
+# 📁 File: tests/test_hot_statements.py
+# 📍 Location: telegram_card_bot/tests/test_hot_statements.py
+# 📝 Description: Hot statements keep working across pool acquires
+# ============================================================
+
+from config import Config
+from db import HOT_STATEMENTS, db, ensure_user, get_user_by_id
+
+
+def test_every_hot_statement_prepares_on_each_acquire(fresh_db, run):
+    async def scenario():
+        for _ in range(2):
+            async with db.acquire() as conn:
+                for name, sql in HOT_STATEMENTS.items():
+                    assert await conn.prepare(sql), name
+
+    run(scenario())
+
+
+def test_same_statement_runs_twice_through_the_pool(fresh_db, run):
+    async def scenario():
+        backends = []
+        # More calls than pooled connections, so at least one connection is reused
+        for attempt in range(Config.DB_MAX_CONNECTIONS + 1):
+            user = await ensure_user(None, 1001, "lulu", f"Lulu {attempt}", None)
+            assert user["first_name"] == f"Lulu {attempt}"
+            assert (await get_user_by_id(None, 1001))["first_name"] == f"Lulu {attempt}"
+            assert await db.fetchval_prepared("user_role", 1001) is None
+            backends.append(await db.fetchval("SELECT pg_backend_pid()"))
+        return backends
+
+    backends = run(scenario())
+    assert len(set(backends)) < len(backends)
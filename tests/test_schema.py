@@ -0,0 +1,72 @@
+# ============================================================
+# 📁 File: tests/test_schema.py
+# 📍 Location: telegram_card_bot/tests/test_schema.py
+# 📝 Description: init_db on fresh and older databases
+# ============================================================
+
+from db import (
+    SCHEMA_VERSION,
+    add_card,
+    db,
+    get_cards_by_character,
+    init_db,
+    search_card_catalog,
+)
+
+TABLES = ("users", "cards", "collections", "groups", "trades", "schema_version")
+
+COLLECTIONS_UNIQUE_INCLUDES_SQL = """
+    SELECT i.indnatts > i.indnkeyatts
+    FROM pg_constraint c
+    JOIN pg_index i ON i.indexrelid = c.conindid
+    WHERE c.conrelid = 'collections'::regclass
+      AND c.conname = 'collections_user_card_unique'
+"""
+
+
+def test_init_db_builds_a_fresh_database(fresh_db, run):
+    async def scenario():
+        for table in TABLES:
+            assert await db.fetchval("SELECT to_regclass($1) IS NOT NULL", table), table
+
+        assert await db.fetchval("SELECT MAX(version) FROM schema_version") == SCHEMA_VERSION
+        assert await db.fetchval(COLLECTIONS_UNIQUE_INCLUDES_SQL) is True
+
+        # Up to date: a second start skips the script
+        assert await init_db(None)
+
+    run(scenario())
+
+
+def test_init_db_reruns_the_script_on_an_existing_database(fresh_db, run):
+    async def scenario():
+        await add_card(None, "Naruto", "Hinata", 5, "photo-1", 42)
+
+        # An older install: plain constraint index and no recorded version
+        await db.execute("""
+            ALTER TABLE collections DROP CONSTRAINT collections_user_card_unique;
+            ALTER TABLE collections
+                ADD CONSTRAINT collections_user_card_unique UNIQUE (user_id, card_id);
+            DELETE FROM schema_version;
+        """)
+
+        assert await init_db(None)
+        assert await db.fetchval(COLLECTIONS_UNIQUE_INCLUDES_SQL) is True
+        assert await db.fetchval(
+            "SELECT COUNT(*) FROM pg_indexes WHERE tablename = 'collections' AND indexdef LIKE '%(user_id, card_id)%'"
+        ) == 1
+        assert await db.fetchval("SELECT COUNT(*) FROM cards") == 1
+
+    run(scenario())
+
+
+def test_card_searches_work_with_or_without_trigram_indexes(fresh_db, run):
+    async def scenario():
+        await add_card(None, "Naruto", "Hinata", 5, "photo-1", 42)
+        await add_card(None, "Bleach", "Rukia", 7, "photo-2", 42)
+
+        assert [c["character_name"] for c in await search_card_catalog(None, "hina")] == ["Hinata"]
+        assert [c["character_name"] for c in await get_cards_by_character(None, "HINATA")] == ["Hinata"]
+        assert await get_cards_by_character(None, "Hin_ta") == []
+
+    run(scenario())
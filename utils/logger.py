@@ -254,9 +254,9 @@ def log_shutdown(message: str) -> None:
     app_logger.info(f"🛑 {message}")
 
 
-def log_database(message: str) -> None:
-    """Log database-related messages."""
-    app_logger.info(f"🗄️ {message}")
+def log_database(message: str, *args) -> None:
+    """Log database-related messages; ``args`` are %-formatted only if emitted."""
+    app_logger.info("🗄️ " + message, *args)
 
 
 def log_webhook(message: str) -> None:
@@ -273,7 +273,7 @@ def log_command(user_id: int, command: str, chat_id: int) -> None:
         command: Command name
         chat_id: Chat ID where command was executed
     """
-    app_logger.info(f"📨 Command /{command} from user {user_id} in chat {chat_id}")
+    app_logger.info("📨 Command /%s from user %s in chat %s", command, user_id, chat_id)
 
 
 def log_card_catch(user_id: int, card_name: str, rarity: str) -> None:
@@ -285,7 +285,7 @@ def log_card_catch(user_id: int, card_name: str, rarity: str) -> None:
         card_name: Name of the caught card
         rarity: Card rarity
     """
-    app_logger.info(f"🎯 User {user_id} caught {card_name} ({rarity})")
+    app_logger.info("🎯 User %s caught %s (%s)", user_id, card_name, rarity)
 
 
 def log_error_with_context(